@@ -1,6 +1,8 @@
 import numpy as np
 from collections import OrderedDict
 
+from domino_tiling import stats
+
 # --- 1. Constants and Data Definition ---
 # 4x4 Natural Square (Matrix containing numbers 1 to 16)
 NATURAL_SQUARE = np.array([
@@ -59,6 +61,9 @@ for line in PATTERNS_RAW.strip().split('\n'):
         PATTERNS[pattern_index] = cleaned_line
         pattern_index += 1
 
+# Normalized pattern string -> P_id, for O(1) rotated-pair lookups
+PATTERN_IDS = {pattern_str: pid for pid, pattern_str in PATTERNS.items()}
+
 # Target Invariant Sum (Constant C)
 TARGET_SUM = 1428
 
@@ -115,10 +120,9 @@ def find_rotated_pair_id(P_rot_str):
     """Normalizes the rotated pattern string and finds the matching P_id."""
     P_rot_normalized = normalize_pattern_str(P_rot_str)
 
-    # Compare with all pre-defined patterns
-    for pid, pattern_str in PATTERNS.items():
-        if pattern_str == P_rot_normalized:
-            return f"P{pid}"
+    pid = PATTERN_IDS.get(P_rot_normalized)
+    if pid is not None:
+        return f"P{pid}"
 
     return 'N/A (Error)'
 
@@ -130,15 +134,18 @@ def verify_rotation_identity(degrees):
     total_patterns = len(PATTERNS)
 
     for pid, pattern_str in PATTERNS.items():
+        stats.count('pairs_tested')
         try:
-            P_labels = np.array(list(pattern_str)).reshape((4, 4))
-            S_prod_P = calculate_s_prod(parse_pattern_to_domino_values(P_labels))
+            with stats.stage('metrics'):
+                P_labels = np.array(list(pattern_str)).reshape((4, 4))
+                S_prod_P = calculate_s_prod(parse_pattern_to_domino_values(P_labels))
 
-            P_rot_str = get_rotated_pattern_str(pattern_str, degrees)
-            P_rot_labels = np.array(list(P_rot_str)).reshape((4, 4))
-            S_prod_P_rot = calculate_s_prod(parse_pattern_to_domino_values(P_rot_labels))
+                P_rot_str = get_rotated_pattern_str(pattern_str, degrees)
+                P_rot_labels = np.array(list(P_rot_str)).reshape((4, 4))
+                S_prod_P_rot = calculate_s_prod(parse_pattern_to_domino_values(P_rot_labels))
 
-            P_rot_id = find_rotated_pair_id(P_rot_str)
+            with stats.stage('canonicalize'):
+                P_rot_id = find_rotated_pair_id(P_rot_str)
 
             total_sum = S_prod_P + S_prod_P_rot
             is_invariant = (total_sum == TARGET_SUM)
@@ -203,6 +210,7 @@ def generate_latex_table(results, degrees, invariant_count, total_patterns):
 # --- 5. Execution ---
 
 if __name__ == "__main__":
+    stats.configure()
 
     # Execute 90-degree rotation verification
     rotation_degrees = 90
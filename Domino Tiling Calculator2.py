@@ -1,5 +1,7 @@
 import numpy as np
 
+from domino_tiling import stats
+
 # 1. Definition of the 4x4 Natural Square (1 to 16)
 # This matrix defines the numerical values assigned to each cell.
 NATURAL_SQUARE = np.array([
@@ -296,8 +298,9 @@ def main():
 
     # Pre-parse domino values for all patterns
     parsed_dominoes = {}
-    for pid, pattern_str in PATTERNS.items():
-        parsed_dominoes[pid] = parse_pattern_to_dominoes(pattern_str)
+    with stats.stage('parse'):
+        for pid, pattern_str in PATTERNS.items():
+            parsed_dominoes[pid] = parse_pattern_to_dominoes(pattern_str)
         
     print("## 📊 Verification Results: Pair Sums of Block Sums Raised to Power k")
     print("------------------------------------------------------------------------------------------")
@@ -314,10 +317,12 @@ def main():
         sum_of_sums = {}
 
         # Calculate sums for k=1 to k=4
-        for k in range(1, 5):
-            sums_i[k] = calculate_sum_of_block_sums_power(dominoes_i, k)
-            sums_j[k] = calculate_sum_of_block_sums_power(dominoes_j, k)
-            sum_of_sums[k] = sums_i[k] + sums_j[k]
+        stats.count('pairs_tested')
+        with stats.stage('metrics'):
+            for k in range(1, 5):
+                sums_i[k] = calculate_sum_of_block_sums_power(dominoes_i, k)
+                sums_j[k] = calculate_sum_of_block_sums_power(dominoes_j, k)
+                sum_of_sums[k] = sums_i[k] + sums_j[k]
 
         results[(pid_i, pid_j)] = sum_of_sums
         
@@ -350,4 +355,5 @@ def main():
 
 
 if __name__ == "__main__":
+    stats.configure()
     main()
\ No newline at end of file
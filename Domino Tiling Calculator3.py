@@ -1,5 +1,7 @@
 import numpy as np
 
+from domino_tiling import stats
+
 # 1. Definition of the 4x4 Natural Square (1 to 16)
 NATURAL_SQUARE = np.array([
     [ 1,  2,  3,  4],
@@ -106,13 +108,15 @@ def main():
 
     # Pre-parse domino values for all patterns
     parsed_dominoes = {}
-    for pid, pattern_str in PATTERNS.items():
-        parsed_dominoes[pid] = parse_pattern_to_dominoes(pattern_str)
+    with stats.stage('parse'):
+        for pid, pattern_str in PATTERNS.items():
+            parsed_dominoes[pid] = parse_pattern_to_dominoes(pattern_str)
 
     # Pre-calculate S_prod^2(P) for all patterns
     all_s_prod_sq = {}
-    for pid in range(1, 37):
-        all_s_prod_sq[pid] = calculate_sum_of_block_products_squared(parsed_dominoes[pid])
+    with stats.stage('metrics'):
+        for pid in range(1, 37):
+            all_s_prod_sq[pid] = calculate_sum_of_block_products_squared(parsed_dominoes[pid])
 
     print("## 📊 Verification Results: Pair Sums of 2-Block Product Square Sum ($S_{\\text{prod}^2}$)")
     print("--------------------------------------------------------------------------------")
@@ -123,6 +127,7 @@ def main():
 
     # Execute calculation for the specified pairings
     for pid_i, pid_j in PAIRINGS:
+        stats.count('pairs_tested')
         s_prod_sq_i = all_s_prod_sq[pid_i]
         s_prod_sq_j = all_s_prod_sq[pid_j]
         sum_of_products_sq = s_prod_sq_i + s_prod_sq_j
@@ -151,4 +156,5 @@ def main():
 
 
 if __name__ == "__main__":
+    stats.configure()
     main()
\ No newline at end of file
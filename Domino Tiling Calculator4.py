@@ -1,6 +1,8 @@
 import numpy as np
 from itertools import combinations
 
+from domino_tiling import stats
+
 # Define the 36 domino tiling patterns
 # The indices (0-7) represent the 8 individual domino blocks.
 patterns = {
@@ -56,7 +58,7 @@ def calculate_s_sum_k(pattern, k):
                 visited.add(block_id)
                 positions = [(r, c) for r in range(4) for c in range(4) 
                            if pattern[r][c] == block_id]
-                block_sum = sum(grid[r, c] for r, c in positions)
+                block_sum = sum(int(grid[r, c]) for r, c in positions)
                 block_sums.append(block_sum)
     
     return sum(s**k for s in block_sums)
@@ -74,7 +76,7 @@ def calculate_s_prod(pattern):
                 visited.add(block_id)
                 positions = [(r, c) for r in range(4) for c in range(4) 
                            if pattern[r][c] == block_id]
-                values = [grid[r, c] for r, c in positions]
+                values = [int(grid[r, c]) for r, c in positions]
                 # Each block has exactly two cells, so their product is calculated
                 products.append(values[0] * values[1])
     
@@ -91,30 +93,35 @@ def find_perfect_complementary_pairs():
     
     # Iterate through all unique pairs (i, j) where i < j
     for i in range(1, 37):
+        stats.count('tilings_scanned')
         if i in used:
             continue
             
         pattern_i = patterns[i]
-        s_sum1_i = calculate_s_sum_k(pattern_i, 1)
-        s_sum2_i = calculate_s_sum_k(pattern_i, 2)
-        s_sum3_i = calculate_s_sum_k(pattern_i, 3)
-        s_prod_i = calculate_s_prod(pattern_i)
+        with stats.stage('metrics'):
+            s_sum1_i = calculate_s_sum_k(pattern_i, 1)
+            s_sum2_i = calculate_s_sum_k(pattern_i, 2)
+            s_sum3_i = calculate_s_sum_k(pattern_i, 3)
+            s_prod_i = calculate_s_prod(pattern_i)
         
         for j in range(i+1, 37):
             if j in used:
                 continue
                 
             pattern_j = patterns[j]
-            s_sum1_j = calculate_s_sum_k(pattern_j, 1)
-            s_sum2_j = calculate_s_sum_k(pattern_j, 2)
-            s_sum3_j = calculate_s_sum_k(pattern_j, 3)
-            s_prod_j = calculate_s_prod(pattern_j)
+            with stats.stage('metrics'):
+                s_sum1_j = calculate_s_sum_k(pattern_j, 1)
+                s_sum2_j = calculate_s_sum_k(pattern_j, 2)
+                s_sum3_j = calculate_s_sum_k(pattern_j, 3)
+                s_prod_j = calculate_s_prod(pattern_j)
+            stats.count('pairs_tested')
             
             # Check the Complete Algebraic Complementary Pair conditions
-            if (abs((s_sum1_i + s_sum1_j) - C1) < 1e-9 and
-                abs((s_sum2_i + s_sum2_j) - C2) < 1e-9 and
-                abs((s_sum3_i + s_sum3_j) - C3) < 1e-9 and
-                abs((s_prod_i + s_prod_j) - C_prod) < 1e-9):
+            # Exact integer comparisons (no float tolerance)
+            if (s_sum1_i + s_sum1_j == C1 and
+                s_sum2_i + s_sum2_j == C2 and
+                s_sum3_i + s_sum3_j == C3 and
+                s_prod_i + s_prod_j == C_prod):
                 
                 results.append({
                     'pair': (i, j),
@@ -135,7 +142,8 @@ def verify_uniqueness():
     print("Verification Program for Unique Partition of Complete Complementary Pairs")
     print("=" * 80)
     
-    pairs, used = find_perfect_complementary_pairs()
+    with stats.stage('pair_search'):
+        pairs, used = find_perfect_complementary_pairs()
     
     print(f"\n[Results]")
     print(f"Number of Complete Complementary Pairs Found: {len(pairs)}")
@@ -184,6 +192,7 @@ def verify_uniqueness():
     return len(pairs) == 18 and len(used) == 36 and all_unique
 
 if __name__ == "__main__":
+    stats.configure()
     success = verify_uniqueness()
     print("\n" + "=" * 80)
     if success:
@@ -15,6 +15,8 @@ possibly with relabeled blocks).
 import numpy as np
 from itertools import permutations
 
+from domino_tiling import stats
+
 # ============================================================
 # STEP 1: Define all 36 tilings as 4x4 label grids
 # Labels are integers 0-7 (representing A-H)
@@ -292,6 +294,8 @@ TRANSFORMS = {
 # Precompute normalized forms of all 36 patterns
 NORM_PATTERNS = [normalize(p) for p in PATTERNS]
 NORM_SET = set(NORM_PATTERNS)
+# Canonical form -> pattern index, for O(1) lookups in the orbit builder
+NORM_INDEX = {norm: i for i, norm in enumerate(NORM_PATTERNS)}
 
 # ============================================================
 # STEP 4: Check if a transformed tiling is fixed (= same tiling)
@@ -302,6 +306,7 @@ def is_fixed(pattern_idx, transform_func):
     Returns True if applying transform_func to PATTERNS[pattern_idx]
     yields a tiling with the same domino structure (up to relabeling).
     """
+    stats.count('fixed_checks')
     original = PATTERNS[pattern_idx]
     transformed = transform_grid(original, transform_func)
     return normalize(transformed) == NORM_PATTERNS[pattern_idx]
@@ -310,31 +315,17 @@ def is_fixed(pattern_idx, transform_func):
 # STEP 5: Compute Fix(g) for each transformation
 # ============================================================
 
-print("=" * 70)
-print("Burnside's Lemma: Fixed-Point Verification for 4x4 Domino Tilings")
-print("=" * 70)
-print()
-
-total_fixed = 0
-results = {}
-
-for name, func in TRANSFORMS.items():
-    fixed_ids = [i+1 for i in range(36) if is_fixed(i, func)]
-    count = len(fixed_ids)
-    total_fixed += count
-    results[name] = (count, fixed_ids)
-
-    id_str = ', '.join(f'P{i}' for i in fixed_ids) if fixed_ids else 'none'
-    print(f"|Fix({name:5s})| = {count:2d}  →  {id_str}")
-
-print()
-print(f"Sum of |Fix(g)| = {total_fixed}")
-families = total_fixed / 8
-print(f"Number of orbits (families) = {total_fixed} / 8 = {families}")
-print()
+def compute_fixed_points():
+    """Returns {name: (|Fix(g)|, 1-based IDs of the fixed patterns)}."""
+    results = {}
+    for name, func in TRANSFORMS.items():
+        with stats.stage('fixed_points'):
+            fixed_ids = [i+1 for i in range(36) if is_fixed(i, func)]
+        results[name] = (len(fixed_ids), fixed_ids)
+    return results
 
 # ============================================================
-# STEP 6: Verify against the values claimed in the paper
+# STEP 6: Values claimed in the paper
 # ============================================================
 
 CLAIMED = {
@@ -348,74 +339,103 @@ CLAIMED = {
     's_d2': 0,
 }
 
-print("=" * 70)
-print("Verification against paper's claimed values:")
-print("=" * 70)
-print(f"{'Transform':<8} {'Computed':>10} {'Claimed':>10} {'Match':>8}")
-print("-" * 40)
-
-all_ok = True
-for name in TRANSFORMS:
-    computed = results[name][0]
-    claimed  = CLAIMED[name]
-    ok = computed == claimed
-    if not ok:
-        all_ok = False
-    mark = "✅" if ok else "❌"
-    print(f"{name:<8} {computed:>10} {claimed:>10} {mark:>8}")
-
-print()
-if all_ok:
-    print("✅ All values match. Burnside's Lemma yields 9 families.")
-else:
-    print("❌ Some values do not match — please check pattern definitions.")
-
-# ============================================================
-# STEP 7: Detailed listing of fixed patterns per transformation
-# ============================================================
-
-print()
-print("=" * 70)
-print("Detailed fixed-pattern listing (for Table in paper):")
-print("=" * 70)
-for name, (count, ids) in results.items():
-    id_str = ', '.join(f'P{i}' for i in ids) if ids else 'none'
-    print(f"  {name:6s}: |Fix| = {count:2d}   [{id_str}]")
-
 # ============================================================
-# STEP 8: Verify the 9-orbit structure (Burnside count = 9)
+# STEP 8: Orbit (family) structure
 # ============================================================
 
-print()
-print("=" * 70)
-print("Orbit (Family) structure:")
-print("=" * 70)
-
-visited = set()
-orbits = []
-for i in range(36):
-    if i in visited:
-        continue
-    orbit = set()
-    for func in TRANSFORMS.values():
-        transformed = transform_grid(PATTERNS[i], func)
-        norm = normalize(transformed)
-        # Find which pattern index matches
-        try:
-            j = NORM_PATTERNS.index(norm)
-            orbit.add(j)
-        except ValueError:
-            pass  # transformed tiling not in our list (shouldn't happen)
-    orbit_ids = sorted(orbit)
-    for idx in orbit_ids:
-        visited.add(idx)
-    orbits.append(orbit_ids)
-
-for k, orb in enumerate(orbits):
-    id_str = ', '.join(f'P{i+1}' for i in orb)
-    print(f"  Family {k+1} (size {len(orb)}): {id_str}")
-
-print()
-print(f"Total families found: {len(orbits)}")
-assert len(orbits) == 9, "Expected 9 families!"
-print("✅ Confirmed: 9 equivalence classes under D4.")
\ No newline at end of file
+def compute_orbits():
+    """Returns the orbits as sorted lists of 0-based pattern indices."""
+    visited = set()
+    orbits = []
+    for i in range(36):
+        if i in visited:
+            continue
+        orbit = set()
+        with stats.stage('orbits'):
+            for func in TRANSFORMS.values():
+                stats.count('orbit_images')
+                transformed = transform_grid(PATTERNS[i], func)
+                norm = normalize(transformed)
+                # Find which pattern index matches
+                j = NORM_INDEX.get(norm)
+                if j is not None:
+                    orbit.add(j)
+                # else: transformed tiling not in our list (shouldn't happen)
+        orbit_ids = sorted(orbit)
+        for idx in orbit_ids:
+            visited.add(idx)
+        orbits.append(orbit_ids)
+    return orbits
+
+
+def main():
+    print("=" * 70)
+    print("Burnside's Lemma: Fixed-Point Verification for 4x4 Domino Tilings")
+    print("=" * 70)
+    print()
+
+    results = compute_fixed_points()
+    total_fixed = 0
+    for name, (count, fixed_ids) in results.items():
+        total_fixed += count
+        id_str = ', '.join(f'P{i}' for i in fixed_ids) if fixed_ids else 'none'
+        print(f"|Fix({name:5s})| = {count:2d}  →  {id_str}")
+
+    print()
+    print(f"Sum of |Fix(g)| = {total_fixed}")
+    families = total_fixed / 8
+    print(f"Number of orbits (families) = {total_fixed} / 8 = {families}")
+    print()
+
+    # Verify against the values claimed in the paper
+    print("=" * 70)
+    print("Verification against paper's claimed values:")
+    print("=" * 70)
+    print(f"{'Transform':<8} {'Computed':>10} {'Claimed':>10} {'Match':>8}")
+    print("-" * 40)
+
+    all_ok = True
+    for name in TRANSFORMS:
+        computed = results[name][0]
+        claimed  = CLAIMED[name]
+        ok = computed == claimed
+        if not ok:
+            all_ok = False
+        mark = "✅" if ok else "❌"
+        print(f"{name:<8} {computed:>10} {claimed:>10} {mark:>8}")
+
+    print()
+    if all_ok:
+        print("✅ All values match. Burnside's Lemma yields 9 families.")
+    else:
+        print("❌ Some values do not match — please check pattern definitions.")
+
+    # STEP 7: Detailed listing of fixed patterns per transformation
+    print()
+    print("=" * 70)
+    print("Detailed fixed-pattern listing (for Table in paper):")
+    print("=" * 70)
+    for name, (count, ids) in results.items():
+        id_str = ', '.join(f'P{i}' for i in ids) if ids else 'none'
+        print(f"  {name:6s}: |Fix| = {count:2d}   [{id_str}]")
+
+    # Verify the 9-orbit structure (Burnside count = 9)
+    print()
+    print("=" * 70)
+    print("Orbit (Family) structure:")
+    print("=" * 70)
+
+    orbits = compute_orbits()
+    for k, orb in enumerate(orbits):
+        id_str = ', '.join(f'P{i+1}' for i in orb)
+        print(f"  Family {k+1} (size {len(orb)}): {id_str}")
+
+    print()
+    print(f"Total families found: {len(orbits)}")
+    assert len(orbits) == 9, "Expected 9 families!"
+    print("✅ Confirmed: 9 equivalence classes under D4.")
+
+
+if __name__ == "__main__":
+    stats.configure()
+    main()
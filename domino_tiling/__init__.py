@@ -0,0 +1,66 @@
+"""
+Domino Tiling Library
+=====================
+Shared building blocks for the verification scripts: board-size independent
+enumeration of domino tilings and the transfer-matrix machinery behind it.
+
+Names are imported from their submodules on first access, so
+`import domino_tiling` (or `from domino_tiling import iter_tilings`) loads
+neither NumPy nor any module it does not need. `Board` holds the lazily
+computed shared objects of one board, and `python -m domino_tiling` runs
+the verifications as subcommands (see cli.py).
+"""
+
+import importlib
+
+_EXPORTS = {
+    'enumerator': ('iter_dominoes', 'iter_tilings', 'to_label_grid', 'to_pattern_str'),
+    'transfer': ('count_tilings', 'count_strip_tilings'),
+    'tilingset': ('TilingSet', 'encode_dominoes', 'encode_label_grid', 'parse_labels'),
+    'metrics': ('batch_metrics', 'compute_metrics', 'natural_weights',
+                'register_block_functional', 'tiling_metrics'),
+    'complement': ('PAPER_CONSTANTS_4X4', 'PAPER_PAIRINGS_4X4', 'complement_pairs',
+                   'metric_complement_pairs', 'pair_sum_verdicts'),
+    'partition': ('ComponentTooLarge', 'count_partitions', 'iter_partitions',
+                  'multiplicity_factors'),
+    'index': ('CanonicalIndex',),
+    'symmetry': ('D4_ELEMENTS', 'action_table', 'burnside_orbit_count', 'element_pairs',
+                 'fixed_counts', 'fixed_point_counts', 'orbit_count', 'orbits',
+                 'stabilizer_sizes', 'transform_tilings'),
+    'kasteleyn': ('kasteleyn_count',),
+    'weights': ('magic_square', 'magic_square_weights', 'permuted_weights',
+                'random_integer_weights'),
+    'prover': ('grid_linear_family', 'prove_pair_identity'),
+    'discovery': ('discover_pair_identities', 'format_identity'),
+    'cascade': ('PairCascade', 'format_report'),
+    'cache': ('TilingCache',),
+    'store': ('StoreWriter', 'TilingStore', 'write_enumeration', 'write_store'),
+    'bench': ('compare_to_baseline', 'run_benchmarks'),
+    'board': ('Board', 'get_board'),
+    'flips': ('FlipWalker',),
+    'flipgraph': ('FlipGraph', 'build_flip_graph'),
+    'histogram': ('complement_pair_count', 'histogram_arrays', 'metric_histogram'),
+    'moments': ('KasteleynMoments', 'metric_moments'),
+    'sampler': ('cftp_batch', 'sample_intervals', 'sample_tilings'),
+}
+
+_SUBMODULES = ('stats', 'cli')
+
+_ORIGIN = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_ORIGIN) + list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    module = _ORIGIN.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,390 @@
+"""
+Benchmark Suite
+===============
+Times every verification stage of the scripts on a list of boards, using
+the library code that replaces each script's hot loop, and on 4x4 also the
+scripts' own functions next to it:
+
+    stage        script step it replaces                 throughput unit
+    enumerate    PATTERNS_RAW / patterns literals        tilings
+    metrics      s_sum_k, s_prod, s_prod2                tilings
+    symmetry     is_fixed and the orbit loop             tilings
+    rotation     verify_rotation_identity                pairs (P, P^90)
+    complement   the C(N, 2) is_valid_pair scan          candidate pairs
+    partitions   enumerate_perfect_matchings             valid pairs
+
+    script stage       script function
+    script_metrics     enumerate_all_partitions.compute_all_metrics
+    script_symmetry    calculator0_symmetry_check.compute_fixed_points
+                       and compute_orbits
+    script_rotation    Domino Tiling Calculator1.verify_rotation_identity(90)
+    script_complement  enumerate_all_partitions.find_valid_pairs
+    script_partitions  enumerate_all_partitions.enumerate_perfect_matchings
+
+The scripts hard-code the 36 tilings of 4x4, so their stages are recorded
+as skipped on every other board.
+
+Every stage is run once under tracemalloc (peak bytes, which includes
+NumPy buffers) and then repeated untraced until `min_time` seconds have
+passed or `max_repeat` runs are done; the fastest run is reported with its
+CPU time and throughput. Across boards, the log-log slope of seconds
+against the tiling count gives each stage's scaling exponent.
+
+The complement constants are the pair sums of the first tiling and its
+90-degree image (180 degrees on rectangles), so on 4x4 they are
+PAPER_CONSTANTS_4X4. Partitions are counted only when no component of the
+valid-pair graph exceeds partition.COMPONENT_LIMIT nodes (the bitmask DP is
+exponential in component size); otherwise the stage is recorded as skipped.
+
+The default boards stop at 6x6. 8x8 (12,988,816 tilings) takes minutes
+and gigabytes per stage, so it only runs when asked for with --boards.
+
+Run as a script to write a JSON report and compare it with a baseline
+report from an earlier run (exit status 1 on a regression):
+
+    python -m domino_tiling.bench --boards 4x4 6x6 --output bench.json
+    python -m domino_tiling.bench --baseline bench.json --tolerance 1.25
+
+benchmarks/baseline-4x4.json is a checked-in 4x4 report. Its timings are
+from one machine and most stages take under a millisecond, so compare with
+a loose tolerance elsewhere:
+
+    python -m domino_tiling.bench --boards 4x4 \
+        --baseline benchmarks/baseline-4x4.json --tolerance 3
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .complement import metric_complement_pairs, pair_sum_verdicts
+from .metrics import metric_names, natural_weights, tiling_metrics
+from .partition import ComponentTooLarge, count_partitions
+from .symmetry import action_table, element_pairs, fixed_counts, orbit_labels
+from .tilingset import TilingSet
+
+FORMAT_VERSION = 1
+DEFAULT_BOARDS = ('4x4', '4x6', '6x6')
+DEFAULT_TOLERANCE = 1.25
+K_MAX = 3
+
+
+def parse_board(text):
+    """'6x8' -> (6, 8)."""
+    rows, _, cols = text.lower().partition('x')
+    return int(rows), int(cols)
+
+
+# ============================================================
+# Stages
+# ============================================================
+# Each stage reads what earlier stages left in `state`, stores its own
+# result there and returns (items processed, unit), or None when skipped.
+
+def _stage_enumerate(state):
+    state['tilings'] = TilingSet.from_enumeration(state['rows'], state['cols'])
+    return len(state['tilings']), 'tilings'
+
+
+def _stage_metrics(state):
+    tilings = state['tilings']
+    state['metrics'] = tiling_metrics(tilings, state['weights'], K_MAX, ('s_prod', 's_prod2'))
+    return len(tilings), 'tilings'
+
+
+def _stage_symmetry(state):
+    tilings = state['tilings']
+    tilings._index = None  # canonicalization is part of the stage
+    table = action_table(tilings)
+    fixed_counts(table)
+    orbit_labels(table)
+    state['table'] = table
+    return len(tilings), 'tilings'
+
+
+def _stage_rotation(state):
+    element = 'r90' if state['rows'] == state['cols'] else 'r180'
+    pairs = element_pairs(state['table'], element)
+    state['verdict'] = pair_sum_verdicts(state['metrics']['s_prod'], pairs)
+    return len(pairs), 'pairs'
+
+
+def _stage_complement(state):
+    metrics = state['metrics']
+    element = 'r90' if state['rows'] == state['cols'] else 'r180'
+    partner = int(element_pairs(state['table'], element)[0, 1])
+    names = metric_names(K_MAX, ('s_prod',))
+    constants = {name: int(metrics[name][0]) + int(metrics[name][partner]) for name in names}
+    state['pairs'] = metric_complement_pairs({name: metrics[name] for name in names}, constants)
+    n = len(state['tilings'])
+    return n * (n - 1) // 2, 'pairs'
+
+
+def _stage_partitions(state):
+    n, pairs = len(state['tilings']), state['pairs']
+    try:
+        state['partitions'] = count_partitions(n, pairs)
+    except ComponentTooLarge:
+        return None
+    return len(pairs), 'pairs'
+
+
+# ============================================================
+# Script stages
+# ============================================================
+# The scripts' own functions on their hard-coded 4x4 data. They need
+# nothing from `state` beyond the board, so each runs on its own.
+
+SCRIPT_DIRECTORY = Path(__file__).resolve().parent.parent
+_scripts = {}
+
+
+def load_script(filename):
+    """Imports a script of the repository root by file name (once)."""
+    if filename not in _scripts:
+        path = SCRIPT_DIRECTORY / filename
+        spec = importlib.util.spec_from_file_location(path.stem.replace(' ', '_'), path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+
+def _script_stage(run):
+    def stage(state):
+        if (state['rows'], state['cols']) != (4, 4):
+            return None
+        return run()
+    return stage
+
+
+@_script_stage
+def _stage_script_metrics():
+    load_script('enumerate_all_partitions.py').compute_all_metrics()
+    return 36, 'tilings'
+
+
+@_script_stage
+def _stage_script_symmetry():
+    script = load_script('calculator0_symmetry_check.py')
+    script.compute_fixed_points()
+    script.compute_orbits()
+    return 36, 'tilings'
+
+
+@_script_stage
+def _stage_script_rotation():
+    _, _, total = load_script('Domino Tiling Calculator1.py').verify_rotation_identity(90)
+    return total, 'pairs'
+
+
+@_script_stage
+def _stage_script_complement():
+    script = load_script('enumerate_all_partitions.py')
+    script.find_valid_pairs(script.compute_all_metrics())
+    return 36 * 35 // 2, 'pairs'
+
+
+@_script_stage
+def _stage_script_partitions():
+    script = load_script('enumerate_all_partitions.py')
+    pairs = script.find_valid_pairs(script.compute_all_metrics())
+    script.enumerate_perfect_matchings(frozenset(range(1, 37)), script.build_graph(pairs))
+    return len(pairs), 'pairs'
+
+
+STAGES = {
+    'enumerate': _stage_enumerate,
+    'metrics': _stage_metrics,
+    'script_metrics': _stage_script_metrics,
+    'symmetry': _stage_symmetry,
+    'script_symmetry': _stage_script_symmetry,
+    'rotation': _stage_rotation,
+    'script_rotation': _stage_script_rotation,
+    'complement': _stage_complement,
+    'script_complement': _stage_script_complement,
+    'partitions': _stage_partitions,
+    'script_partitions': _stage_script_partitions,
+}
+
+
+# ============================================================
+# Measurement
+# ============================================================
+
+def _peak_bytes(stage, state):
+    """Runs `stage` once under tracemalloc; returns (stage result, peak bytes)."""
+    tracemalloc.start()
+    try:
+        result = stage(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def measure(stage, state, min_time=0.2, max_repeat=5, memory=True):
+    """
+    Timing record of one stage: best wall and CPU seconds over the repeats,
+    items processed and throughput, and (with `memory`) peak traced bytes.
+    """
+    record = {'peak_bytes': None}
+    if memory:
+        result, record['peak_bytes'] = _peak_bytes(stage, state)
+        if result is None:
+            return {'skipped': True}
+    wall, cpu = [], []
+    while len(wall) < max_repeat and (not wall or sum(wall) < min_time):
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        result = stage(state)
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+        if result is None:
+            return {'skipped': True}
+    items, unit = result
+    best = min(wall)
+    record.update(seconds=best, cpu_seconds=min(cpu), repeats=len(wall), items=items,
+                  unit=unit, throughput=items / best if best > 0 else None)
+    return record
+
+
+def scaling(results):
+    """
+    Per stage: the (tilings, seconds) points and the least-squares slope of
+    log(seconds) against log(tilings), i.e. T ~ N^exponent.
+    """
+    curves = {}
+    for stage in STAGES:
+        points = sorted((r['tilings'], r['seconds']) for r in results
+                        if r['stage'] == stage and r.get('seconds'))
+        exponent = None
+        if len({n for n, _ in points}) > 1:
+            x = np.log([n for n, _ in points])
+            y = np.log([s for _, s in points])
+            exponent = float(np.polyfit(x, y, 1)[0])
+        curves[stage] = {'exponent': exponent, 'points': points}
+    return curves
+
+
+def run_benchmarks(boards=DEFAULT_BOARDS, stages=None, min_time=0.2, max_repeat=5,
+                   memory=True, log=None):
+    """
+    Benchmarks `stages` (default: all, in pipeline order) on every board and
+    returns the JSON-serializable report.
+    """
+    stages = list(STAGES) if stages is None else list(stages)
+    results = []
+    for board in boards:
+        rows, cols = parse_board(board) if isinstance(board, str) else board
+        state = {'rows': rows, 'cols': cols, 'weights': natural_weights(rows, cols)}
+        # Stages depend on their predecessors, so those always run once.
+        needed = list(STAGES)[:max(list(STAGES).index(s) for s in stages) + 1]
+        for name in needed:
+            if name not in stages:
+                if not name.startswith('script_'):
+                    STAGES[name](state)
+                continue
+            record = measure(STAGES[name], state, min_time, max_repeat, memory)
+            record.update(board=f"{rows}x{cols}", stage=name, tilings=len(state['tilings']))
+            results.append(record)
+            if log is not None:
+                log(format_record(record))
+    return {
+        'format_version': FORMAT_VERSION,
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'min_time': min_time,
+            'max_repeat': max_repeat,
+        },
+        'results': results,
+        'scaling': scaling(results),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Ratios current / baseline seconds for every (board, stage) present in
+    both reports; a ratio above `tolerance` is a regression.
+    """
+    previous = {(r['board'], r['stage']): r for r in baseline['results'] if r.get('seconds')}
+    comparison = []
+    for record in report['results']:
+        old = previous.get((record['board'], record['stage']))
+        if old is None or not record.get('seconds'):
+            continue
+        ratio = record['seconds'] / old['seconds']
+        comparison.append({'board': record['board'], 'stage': record['stage'],
+                           'baseline_seconds': old['seconds'], 'seconds': record['seconds'],
+                           'ratio': ratio, 'regression': ratio > tolerance})
+    return comparison
+
+
+# ============================================================
+# Command line
+# ============================================================
+
+def _format_count(value):
+    for scale, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+        if value >= scale:
+            return f"{value / scale:.2f}{suffix}"
+    return f"{value:.0f}"
+
+
+def format_record(record):
+    board = record.get('board', '')
+    if record.get('skipped'):
+        return f"{board:>6} {record['stage']:<17} skipped"
+    peak = '' if record['peak_bytes'] is None else f"  peak {_format_count(record['peak_bytes'])}B"
+    rate = record['throughput']
+    rate = 'inf' if rate is None else _format_count(rate)
+    return (f"{board:>6} {record['stage']:<17} {record['seconds'] * 1e3:10.2f} ms"
+            f"  {rate:>8} {record['unit']}/s{peak}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--boards', nargs='+', default=list(DEFAULT_BOARDS),
+                        help="boards as RxC (default: %(default)s)")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=None)
+    parser.add_argument('--min-time', type=float, default=0.2)
+    parser.add_argument('--max-repeat', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc run")
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--baseline', help="JSON report of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.boards, args.stages, args.min_time, args.max_repeat,
+                            not args.no_memory, log=print)
+    for stage, curve in report['scaling'].items():
+        if curve['exponent'] is not None:
+            print(f"scaling {stage:<17} T ~ N^{curve['exponent']:.2f}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as handle:
+            report['comparison'] = compare_to_baseline(report, json.load(handle), args.tolerance)
+        for row in report['comparison']:
+            flag = '  REGRESSION' if row['regression'] else ''
+            print(f"{row['board']:>6} {row['stage']:<17} x{row['ratio']:.2f} vs baseline{flag}")
+        status = int(any(row['regression'] for row in report['comparison']))
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
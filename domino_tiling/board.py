@@ -0,0 +1,204 @@
+"""
+Lazily Computed Shared Objects of One Board
+===========================================
+The verification scripts each rebuild the same objects: the tilings, their
+metrics, the D4 action table and the valid-pair graph. A `Board` computes
+each of them on first access and keeps it, so any number of verifications
+(and other tools) share one copy:
+
+    board = get_board(4, 4)
+    board.tilings          TilingSet of every tiling (paper order on 4x4)
+    board.metric('s_prod') per-tiling metric values
+    board.action_table     (N, G) image IDs under the symmetry group
+    board.pair_graph       valid complementary pairs for board.constants
+
+With a TilingCache the expensive objects are also kept on disk. Nothing is
+computed (and NumPy is not imported) until an attribute is read.
+"""
+
+from functools import cached_property, lru_cache
+
+
+class Board:
+    """Tilings, metrics, symmetry table and pair graph of a rows x cols board."""
+
+    def __init__(self, rows=4, cols=4, weights=None, constants=None, cache=None):
+        self.rows = rows
+        self.cols = cols
+        self._weights = weights
+        self._constants = constants
+        self.cache = cache
+        self._metrics = {}
+
+    def __repr__(self):
+        return f"Board({self.rows}x{self.cols})"
+
+    @property
+    def is_square(self):
+        return self.rows == self.cols
+
+    @property
+    def rotation(self):
+        """The quarter turn on square boards, else the half turn."""
+        return 'r90' if self.is_square else 'r180'
+
+    # --------------------------------------------------------
+    # Tilings and metrics
+    # --------------------------------------------------------
+
+    @cached_property
+    def weights(self):
+        if self._weights is not None:
+            return self._weights
+        from .metrics import natural_weights
+        return natural_weights(self.rows, self.cols)
+
+    @cached_property
+    def tilings(self):
+        """Every tiling; the population is checked against Kasteleyn's count."""
+        if self.cache is None:
+            from .tilingset import TilingSet
+            return TilingSet.from_enumeration(self.rows, self.cols)
+        from .kasteleyn import kasteleyn_count
+        tilings = self.cache.tilings(self.rows, self.cols)
+        if len(tilings) != kasteleyn_count(self.rows, self.cols):
+            raise ValueError(f"The cached tilings of {self} do not match Kasteleyn's count.")
+        return tilings
+
+    @cached_property
+    def dominoes(self):
+        """(N, D, 2) domino cell indices of every tiling."""
+        return self.tilings.dominoes()
+
+    def metric(self, name):
+        """Values of one metric ('s_sumK', 's_prod', 's_prod2', ...) for every tiling."""
+        if name not in self._metrics:
+            if self.cache is not None:
+                k_max, names = (int(name[len('s_sum'):]), ()) if name.startswith('s_sum') \
+                    else (0, (name,))
+                self._metrics.update(self.cache.metrics(self.tilings, self.weights, k_max, names))
+            else:
+                from .metrics import compute_metric
+                self._metrics[name] = compute_metric(self.dominoes, self.weights, name)
+        return self._metrics[name]
+
+    def metrics(self, names):
+        """Dict name -> values for several metrics."""
+        return {name: self.metric(name) for name in names}
+
+    # --------------------------------------------------------
+    # Symmetry
+    # --------------------------------------------------------
+
+    @cached_property
+    def elements(self):
+        from .symmetry import group_elements
+        return group_elements(self.rows, self.cols)
+
+    @cached_property
+    def action_table(self):
+        if self.cache is not None:
+            return self.cache.action_table(self.tilings, self.elements)
+        from .symmetry import action_table
+        return action_table(self.tilings, self.elements)
+
+    @cached_property
+    def fixed_counts(self):
+        from .symmetry import fixed_counts
+        return fixed_counts(self.action_table, self.elements)
+
+    @cached_property
+    def orbits(self):
+        from .symmetry import orbits
+        return orbits(self.action_table)
+
+    def element_pairs(self, element):
+        """(N, 2) pairs (P, g(P)) for one group element."""
+        from .symmetry import element_pairs
+        return element_pairs(self.action_table, element, self.elements)
+
+    # --------------------------------------------------------
+    # Pairings and partitions
+    # --------------------------------------------------------
+
+    @cached_property
+    def paper_board(self):
+        """True for the 4x4 natural square of the paper."""
+        if (self.rows, self.cols) != (4, 4):
+            return False
+        from .metrics import natural_weights
+        return list(self.weights) == list(natural_weights(4, 4))
+
+    @cached_property
+    def constants(self):
+        """
+        Pair-sum constants of S_sum^1..3 and S_prod: the paper's on 4x4,
+        elsewhere those of the first tiling and its rotation image.
+        """
+        if self._constants is not None:
+            return dict(self._constants)
+        from .complement import PAPER_CONSTANTS_4X4
+        if self.paper_board:
+            return dict(PAPER_CONSTANTS_4X4)
+        if len(self.tilings) == 0:
+            raise ValueError(f"A {self.rows}x{self.cols} board has no domino tilings.")
+        partner = int(self.element_pairs(self.rotation)[0, 1])
+        return {name: int(self.metric(name)[0]) + int(self.metric(name)[partner])
+                for name in PAPER_CONSTANTS_4X4}
+
+    @cached_property
+    def pairing(self):
+        """The paper's 18 pairs on 4x4, elsewhere the rotation pairs (P, P^g), P < P^g."""
+        import numpy as np
+        if self.paper_board:
+            from .complement import PAPER_PAIRINGS_4X4
+            return np.array(PAPER_PAIRINGS_4X4, dtype=np.int64)
+        pairs = self.element_pairs(self.rotation)
+        return pairs[pairs[:, 0] < pairs[:, 1]]
+
+    @cached_property
+    def pair_graph(self):
+        """(E, 2) valid complementary pairs for `constants`."""
+        if self.cache is not None:
+            return self.cache.complement_pairs(self.tilings, self.constants, self.weights)
+        from .complement import metric_complement_pairs
+        return metric_complement_pairs(self.metrics(self.constants), self.constants)
+
+    @cached_property
+    def flip_graph(self):
+        """CSR flip graph of `tilings` (see flipgraph.py)."""
+        from .flipgraph import build_flip_graph
+        return build_flip_graph(self.tilings)
+
+    def family_diameters(self):
+        """Flip-graph diameter of every D4 family, in `orbits` order."""
+        return [self.flip_graph.set_diameter(orbit) for orbit in self.orbits]
+
+    @cached_property
+    def multiplicity_factors(self):
+        """
+        Per-component matching counts; raises ComponentTooLarge, naming the
+        board, when a component is beyond the bitmask DP.
+        """
+        from .partition import ComponentTooLarge, multiplicity_factors
+        try:
+            return multiplicity_factors(len(self.tilings), self.pair_graph)
+        except ComponentTooLarge as error:
+            raise ComponentTooLarge(f"{self}: {error}") from None
+
+    @cached_property
+    def partition_count(self):
+        total = 1
+        for _, factor in self.multiplicity_factors:
+            total *= factor
+        return total
+
+    def iter_partitions(self):
+        from .partition import iter_partitions
+        return iter_partitions(len(self.tilings), self.pair_graph)
+
+
+@lru_cache(maxsize=None)
+def get_board(rows=4, cols=4):
+    """The shared Board of a rows x cols board with natural weights."""
+    return Board(rows, cols)
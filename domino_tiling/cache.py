@@ -0,0 +1,218 @@
+"""
+Persistent Content-Addressed Cache
+==================================
+Enumerating the 12,988,816 tilings of the 8x8 board, evaluating their metrics
+or building their D4 action table takes seconds to minutes; loading the same
+arrays from disk takes milliseconds. `TilingCache` keeps such arrays as
+`.npy` files in one directory, each named by the SHA-256 of its key:
+
+    (kind, rows, cols, weight digest, metric set, extra parameters,
+     FORMAT_VERSION, code version)
+
+Arrays derived from a TilingSet also carry its size and a digest of its
+packed words, so a subset, sample or reordering never shares an entry with
+the complete set.
+
+The code version is a digest of the library modules that produce cached
+data, so editing any of them invalidates every entry automatically. Entries
+are opened with mmap_mode='r' (object arrays of Python ints, which cannot
+be memory-mapped, are unpickled instead). Every hit refreshes the file's
+mtime; once the directory grows past `max_bytes` the least recently used
+entries are deleted.
+
+The default directory is $DOMINO_TILING_CACHE, else ~/.cache/domino_tiling.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .complement import metric_complement_pairs
+from .metrics import metric_names, natural_weights, tiling_metrics
+from .symmetry import action_table, group_elements
+from .tilingset import TilingSet
+
+FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 4 << 30
+CACHE_ENV = 'DOMINO_TILING_CACHE'
+
+# Modules whose source determines the content of cached arrays.
+_SOURCE_MODULES = ('enumerator.py', 'transfer.py', 'tilingset.py', 'metrics.py',
+                   'symmetry.py', 'index.py', 'complement.py')
+_code_version = None
+
+
+def code_version():
+    """Digest of the library sources that produce cached data."""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        here = Path(__file__).resolve().parent
+        for name in _SOURCE_MODULES:
+            digest.update(name.encode())
+            digest.update((here / name).read_bytes())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+
+def weights_digest(weights):
+    """Short digest of a weight vector (its int64 little-endian bytes)."""
+    data = np.ascontiguousarray(np.asarray(weights, dtype='<i8').reshape(-1))
+    return hashlib.sha256(data.tobytes()).hexdigest()[:16]
+
+
+def tilings_digest(tilings):
+    """(count, digest of the packed words) identifying a TilingSet's content."""
+    return len(tilings), tilings.digest
+
+
+def cache_key(kind, rows, cols, weights=None, metrics=(), extra=()):
+    """Hex key of one cached array."""
+    parts = (kind, int(rows), int(cols),
+             None if weights is None else weights_digest(weights),
+             tuple(metrics), tuple(extra), FORMAT_VERSION, code_version())
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def default_directory():
+    return Path(os.environ.get(CACHE_ENV) or Path.home() / '.cache' / 'domino_tiling')
+
+
+class TilingCache:
+    """
+    Directory of cached `.npy` arrays with an LRU size cap. The typed
+    helpers (tilings, metrics, action_table, complement_pairs) compute on a
+    miss and return memory-mapped arrays on a hit.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory is not None else default_directory()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return self.directory / f"{key}.npy"
+
+    # --------------------------------------------------------
+    # Raw entries
+    # --------------------------------------------------------
+
+    def load(self, key):
+        """The cached array under `key`, or None. Corrupt entries are dropped."""
+        path = self.path(key)
+        try:
+            try:
+                array = np.load(path, mmap_mode='r')
+            except ValueError:
+                array = np.load(path, allow_pickle=True)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return array
+
+    def store(self, key, array):
+        """Writes `array` atomically under `key`, then enforces the size cap."""
+        array = np.asarray(array)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.save(handle, array, allow_pickle=array.dtype == object)
+            os.replace(tmp, self.path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        """Cached array under `key`, computing and storing it on a miss."""
+        array = self.load(key)
+        if array is None:
+            array = np.asarray(compute())
+            self.store(key, array)
+        return array
+
+    def entries(self):
+        """(path, size, mtime) of every entry, least recently used first."""
+        found = []
+        for path in self.directory.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            found.append((path, stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Deletes least recently used entries until the cap is respected."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+
+    # --------------------------------------------------------
+    # Typed helpers
+    # --------------------------------------------------------
+
+    def tilings(self, rows, cols):
+        """All tilings of a board as a TilingSet over a memory-mapped array."""
+        key = cache_key('tilings', rows, cols)
+        words = self.get_or_compute(key, lambda: TilingSet.from_enumeration(rows, cols).words)
+        return TilingSet(rows, cols, words)
+
+    def metrics(self, tilings, weights=None, k_max=3, names=('s_prod',)):
+        """tiling_metrics of a tiling set, cached per metric."""
+        rows, cols = tilings.rows, tilings.cols
+        if weights is None:
+            weights = natural_weights(rows, cols)
+        content = tilings_digest(tilings)
+        keys = {name: cache_key('metric', rows, cols, weights, (name,), extra=content)
+                for name in metric_names(k_max, names)}
+        cached = {name: self.load(key) for name, key in keys.items()}
+        if any(value is None for value in cached.values()):
+            cached = tiling_metrics(tilings, weights, k_max, names)
+            for name, key in keys.items():
+                self.store(key, cached[name])
+        return cached
+
+    def action_table(self, tilings, elements=None):
+        """D4 (or rectangle) action table of a tiling set."""
+        if elements is None:
+            elements = group_elements(tilings.rows, tilings.cols)
+        key = cache_key('action', tilings.rows, tilings.cols,
+                        extra=tuple(elements) + tilings_digest(tilings))
+        return self.get_or_compute(key, lambda: action_table(tilings, elements))
+
+    def complement_pairs(self, tilings, constants, weights=None):
+        """Valid-pair graph (E, 2) of a tiling set for `constants`."""
+        rows, cols = tilings.rows, tilings.cols
+        if weights is None:
+            weights = natural_weights(rows, cols)
+        names = tuple(constants)
+        key = cache_key('pairs', rows, cols, weights, names,
+                        extra=tuple(int(constants[n]) for n in names) + tilings_digest(tilings))
+
+        def compute():
+            k_max = max((int(n[len('s_sum'):]) for n in names if n.startswith('s_sum')),
+                        default=0)
+            functionals = tuple(n for n in names if not n.startswith('s_sum'))
+            return metric_complement_pairs(self.metrics(tilings, weights, k_max, functionals),
+                                           constants)
+
+        return self.get_or_compute(key, compute)
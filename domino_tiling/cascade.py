@@ -0,0 +1,164 @@
+"""
+Cheapest-First Filter Cascade for Complementary-Pair Predicates
+===============================================================
+A complementary pair has to satisfy several identities at once
+(S_sum^1..3, S_prod, and later S_sum^4 or S_prod^2). Calculator4 and
+enumerate_all_partitions evaluate every metric of both tilings before
+testing any identity. The cascade instead
+
+  1. measures, on a sample of candidate pairs, the cost of evaluating each
+     metric (seconds per tiling) and the fraction of pairs it passes,
+  2. orders the stages by cost / (1 - pass rate), the optimal order for
+     independent filters,
+  3. runs the stages one after another on the survivors only, evaluating a
+     metric just for the tilings still appearing in a candidate pair.
+
+Without explicit candidates, the first stage is a hash join (see
+complement.py) over all tilings, so the C(N, 2) pairs are never listed.
+Every run leaves a per-stage report of pass rates and timings.
+"""
+
+import time
+
+import numpy as np
+
+from . import stats
+from .complement import complement_pairs
+from .metrics import compute_metric, exact_add, natural_weights
+
+DEFAULT_SAMPLE = 4096
+
+
+class PairCascade:
+    """
+    Filters pairs of tilings against the identities metric(Pi) + metric(Pj)
+    == constants[metric], computing each metric lazily and only once per
+    tiling.
+    """
+
+    def __init__(self, tilings, constants, weights=None, sample_size=DEFAULT_SAMPLE, seed=0):
+        self.tilings = tilings
+        self.constants = dict(constants)
+        self.weights = natural_weights(tilings.rows, tilings.cols) if weights is None else weights
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self._values = {}
+        self._known = {}
+        self.order = None
+        self.estimates = {}
+        self.report = []
+
+    # --------------------------------------------------------
+    # Lazy metric evaluation
+    # --------------------------------------------------------
+
+    def metric(self, name, ids):
+        """Values of one metric for tiling IDs `ids`, computing missing ones."""
+        n = len(self.tilings)
+        if name not in self._values:
+            self._values[name] = np.zeros(n, dtype=np.int64)
+            self._known[name] = np.zeros(n, dtype=bool)
+        ids = np.asarray(ids, dtype=np.int64)
+        missing = np.unique(ids[~self._known[name][ids]])
+        if len(missing):
+            values = compute_metric(self.tilings[missing].dominoes(), self.weights, name)
+            if values.dtype == object and self._values[name].dtype != object:
+                self._values[name] = self._values[name].astype(object)
+            self._values[name][missing] = values
+            self._known[name][missing] = True
+        return self._values[name][ids]
+
+    def _passes(self, name, pairs):
+        total = exact_add(self.metric(name, pairs[:, 0]), self.metric(name, pairs[:, 1]))
+        return total == self.constants[name]
+
+    # --------------------------------------------------------
+    # Planning
+    # --------------------------------------------------------
+
+    def _sample_pairs(self, pairs):
+        if pairs is not None and len(pairs) <= self.sample_size:
+            return pairs
+        if pairs is not None:
+            return pairs[self.rng.choice(len(pairs), self.sample_size, replace=False)]
+        n = len(self.tilings)
+        i = self.rng.integers(0, n, self.sample_size)
+        j = self.rng.integers(0, n, self.sample_size)
+        keep = i != j
+        return np.stack([np.minimum(i, j), np.maximum(i, j)], axis=1)[keep]
+
+    def plan(self, pairs=None):
+        """
+        Measures cost per tiling and pass rate of every stage on a sample of
+        `pairs` (random pairs when None) and orders the stages by
+        cost / (1 - pass rate). Returns the stage order.
+        """
+        sample = self._sample_pairs(pairs)
+        ids = np.unique(sample) if len(sample) else np.zeros(0, dtype=np.int64)
+        dominoes = self.tilings[ids].dominoes()
+        self.estimates = {}
+        for name in self.constants:
+            start = time.perf_counter()
+            compute_metric(dominoes, self.weights, name)
+            cost = (time.perf_counter() - start) / max(1, len(ids))
+            rate = float(self._passes(name, sample).mean()) if len(sample) else 0.0
+            self.estimates[name] = {'cost_per_tiling': cost, 'pass_rate': rate}
+        self.order = sorted(
+            self.constants,
+            key=lambda name: self.estimates[name]['cost_per_tiling']
+            / max(1e-12, 1.0 - self.estimates[name]['pass_rate']))
+        return self.order
+
+    # --------------------------------------------------------
+    # Execution
+    # --------------------------------------------------------
+
+    def run(self, pairs=None):
+        """
+        Returns the (E, 2) array of pairs passing every stage. With
+        pairs=None the first stage hash-joins all tilings on its metric.
+        Per-stage statistics are left in self.report.
+        """
+        if self.order is None:
+            self.plan(pairs)
+        self.report = []
+        stages = list(self.order)
+        if pairs is None:
+            name = stages.pop(0)
+            start = time.perf_counter()
+            everything = np.arange(len(self.tilings))
+            values = self.metric(name, everything)
+            pairs = complement_pairs(values.reshape(-1, 1), [self.constants[name]])
+            n = len(self.tilings)
+            self.report.append({
+                'stage': name, 'method': 'hash-join', 'candidates': n * (n - 1) // 2,
+                'passed': len(pairs), 'evaluated': n,
+                'seconds': time.perf_counter() - start,
+            })
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        for name in stages:
+            start = time.perf_counter()
+            before = int(self._known[name].sum()) if name in self._known else 0
+            keep = self._passes(name, pairs) if len(pairs) else np.zeros(0, dtype=bool)
+            self.report.append({
+                'stage': name, 'method': 'filter', 'candidates': len(pairs),
+                'passed': int(keep.sum()),
+                'evaluated': int(self._known[name].sum()) - before if name in self._known else 0,
+                'seconds': time.perf_counter() - start,
+            })
+            pairs = pairs[keep]
+        for entry in self.report:
+            stats.count('pairs_tested', entry['candidates'])
+            entry['pass_rate'] = entry['passed'] / entry['candidates'] if entry['candidates'] else 0.0
+        return pairs
+
+
+def format_report(report):
+    """Plain-text table of a cascade report."""
+    lines = [f"{'Stage':<10} {'Method':<10} {'Candidates':>14} {'Passed':>10} "
+             f"{'Pass rate':>10} {'Evaluated':>10} {'Seconds':>9}"]
+    for e in report:
+        lines.append(f"{e['stage']:<10} {e['method']:<10} {e['candidates']:>14,} "
+                     f"{e['passed']:>10,} {e['pass_rate']:>10.4%} {e['evaluated']:>10,} "
+                     f"{e['seconds']:>9.4f}")
+    return '\n'.join(lines)
@@ -0,0 +1,279 @@
+"""
+Command-Line Verifiers
+======================
+    python -m domino_tiling <subcommand> [--board RxC] [options]
+
+    symmetry     |Fix(g)| per group element, Burnside count, families
+                 (calculator0_symmetry_check.py)
+    rotation     S_prod(P) + S_prod(P^g) for every tiling (Calculator1)
+    power-sums   pair sums of S_sum^k over a pairing (Calculator2)
+    prod-square  pair sums of S_prod^2 over a pairing (Calculator3)
+    partition    valid-pair graph and perfect complementary partitions
+                 (Calculator4, enumerate_all_partitions.py)
+    enumerate    list or count the tilings of a board
+    histogram    exact distribution of a metric over all tilings, and the
+                 number of pairs summing to a constant (no enumeration)
+
+Every subcommand works on any board; the 4x4 natural square uses the
+paper's constants and pairing. `symmetry` and `enumerate --check` compare
+the population with Kasteleyn's count. Subcommands import only what they
+use: `enumerate` loads NumPy only for --check. The --stats, --profile and --trace-memory
+flags of stats.py are accepted before or after the subcommand.
+"""
+
+import argparse
+import sys
+
+DEFAULT_BOARD = '4x4'
+
+# |Fix(g)| on the 4x4 board as claimed in the paper (Table 2).
+CLAIMED_FIXED_4X4 = {'e': 36, 'r90': 2, 'r180': 8, 'r270': 2,
+                     's_h': 12, 's_v': 12, 's_d1': 0, 's_d2': 0}
+
+ROTATIONS = {90: 'r90', 180: 'r180', 270: 'r270'}
+
+# Longest list of distinct pair sums printed in full.
+MAX_LISTED = 8
+
+
+def _board_size(text):
+    rows, _, cols = text.lower().partition('x')
+    try:
+        return int(rows), int(cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected RxC, got {text!r}") from None
+
+
+def _board(args):
+    """The shared Board of --board; exits with a message if it has no tilings."""
+    from .board import get_board
+    board = get_board(*args.board)
+    if len(board.tilings) == 0:
+        sys.exit(f"A {board.rows}x{board.cols} board has no domino tilings.")
+    return board
+
+
+def _label(i):
+    return f"P{int(i) + 1}"
+
+
+def _verdict(values):
+    """'invariant (C)' or the sorted distinct values."""
+    distinct = sorted(set(int(v) for v in values))
+    if len(distinct) == 1:
+        return f"invariant ({distinct[0]:,})"
+    if len(distinct) > MAX_LISTED:
+        return (f"NOT invariant, {len(distinct)} distinct values "
+                f"in [{distinct[0]:,}, {distinct[-1]:,}]")
+    return f"NOT invariant, values {distinct}"
+
+
+# ============================================================
+# Subcommands
+# ============================================================
+
+def _population(rows, cols, count):
+    """Prints the tiling count next to Kasteleyn's; True when they agree."""
+    from .kasteleyn import kasteleyn_count
+    expected = kasteleyn_count(rows, cols)
+    ok = count == expected
+    print(f"Tilings: {count:,} ({'matches' if ok else 'does NOT match'} "
+          f"Kasteleyn's count {expected:,})")
+    return ok
+
+
+def cmd_symmetry(args):
+    board = _board(args)
+    _population(board.rows, board.cols, len(board.tilings))
+    counts = board.fixed_counts
+    total = sum(counts.values())
+    for name, count in counts.items():
+        print(f"|Fix({name:5s})| = {count}")
+    print(f"Sum of |Fix(g)| = {total}, orbits = {total} / {len(counts)} "
+          f"= {total // len(counts)}")
+    ok = True
+    if board.paper_board:
+        ok = counts == CLAIMED_FIXED_4X4
+        print("Matches the paper's claimed values." if ok
+              else "Does NOT match the paper's claimed values.")
+    if args.families:
+        for k, orbit in enumerate(board.orbits, 1):
+            print(f"  Family {k} (size {len(orbit)}): {', '.join(map(_label, orbit))}")
+    return 0 if ok else 1
+
+
+def cmd_rotation(args):
+    board = _board(args)
+    element = ROTATIONS[args.degrees]
+    if element not in board.elements:
+        print(f"A {args.degrees}-degree rotation does not preserve a "
+              f"{board.rows}x{board.cols} board.", file=sys.stderr)
+        return 2
+    pairs = board.element_pairs(element)
+    s_prod = board.metric('s_prod')
+    sums = [int(s_prod[i]) + int(s_prod[j]) for i, j in pairs]
+    if args.table:
+        for (i, j), total in zip(pairs, sums):
+            print(f"{_label(i):>5} {int(s_prod[i]):>8} {_label(j):>5} {int(s_prod[j]):>8} "
+                  f"{total:>9}")
+    target = args.target if args.target is not None else sums[0]
+    holds = sum(total == target for total in sums)
+    print(f"S_prod(P) + S_prod(P^{args.degrees}) = {target} holds for {holds}/{len(sums)}")
+    return 0 if holds == len(sums) else 1
+
+
+def _pair_sums(board, name):
+    values = board.metric(name)
+    return [int(values[i]) + int(values[j]) for i, j in board.pairing]
+
+
+def cmd_power_sums(args):
+    board = _board(args)
+    sums = {k: _pair_sums(board, f"s_sum{k}") for k in range(1, args.k_max + 1)}
+    if args.table:
+        for p, (i, j) in enumerate(board.pairing):
+            row = ' | '.join(f"{sums[k][p]:>15,}" for k in sums)
+            print(f"{_label(i)}-{_label(j):<5} | {row}")
+    for k, values in sums.items():
+        print(f"S_sum^{k} pair sum: {_verdict(values)}")
+    return 0
+
+
+def cmd_prod_square(args):
+    board = _board(args)
+    sums = _pair_sums(board, 's_prod2')
+    if args.table:
+        for (i, j), total in zip(board.pairing, sums):
+            print(f"{_label(i)}-{_label(j):<5} | {total:>20,}")
+    print(f"S_prod^2 pair sum: {_verdict(sums)}")
+    return 0
+
+
+def cmd_partition(args):
+    board = _board(args)
+    n = len(board.tilings)
+    degree = [0] * n
+    for i, j in board.pair_graph:
+        degree[i] += 1
+        degree[j] += 1
+    print(f"Constants: {board.constants}")
+    print(f"Valid pairs (edges): {len(board.pair_graph)}")
+    print(f"Tilings with degree > 1: {sum(d > 1 for d in degree)}")
+    from .partition import ComponentTooLarge
+    try:
+        factors = [count for _, count in board.multiplicity_factors if count != 1]
+    except ComponentTooLarge as error:
+        print(f"Perfect complementary partitions: component too large ({error})",
+              file=sys.stderr)
+        return 2
+    product = f" = {' * '.join(map(str, factors))}" \
+        if board.partition_count and len(factors) > 1 else ""
+    print(f"Perfect complementary partitions: {board.partition_count}{product}")
+    if args.list:
+        for k, partition in enumerate(board.iter_partitions(), 1):
+            if args.limit is not None and k > args.limit:
+                break
+            pairs = ', '.join(f"({_label(i)}, {_label(j)})" for i, j in partition)
+            print(f"[Partition {k:02d}] {pairs}")
+    return 0 if board.partition_count else 1
+
+
+def cmd_enumerate(args):
+    rows, cols = args.board
+    if args.count:
+        from .transfer import count_tilings
+        count = count_tilings(rows, cols)
+        if args.check:
+            return 0 if _population(rows, cols, count) else 1
+        print(count)
+        return 0
+    from .enumerator import iter_dominoes, to_pattern_str
+    listed = 0
+    for k, dominoes in enumerate(iter_dominoes(rows, cols)):
+        if args.limit is not None and k >= args.limit:
+            break
+        print(f"{_label(k):>6} {to_pattern_str(dominoes, rows, cols)}")
+        listed += 1
+    if args.check and args.limit is None:
+        return 0 if _population(rows, cols, listed) else 1
+    return 0
+
+
+def cmd_histogram(args):
+    from .histogram import complement_pair_count, metric_histogram
+
+    rows, cols = args.board
+    histogram = metric_histogram(rows, cols, args.metric)
+    if not histogram:
+        print(f"A {rows}x{cols} board has no domino tilings.")
+        return 1
+    values = list(histogram)
+    print(f"{args.metric} over {sum(histogram.values()):,} tilings: {len(values)} distinct "
+          f"values in [{values[0]:,}, {values[-1]:,}]")
+    if args.list:
+        for value, count in histogram.items():
+            print(f"{value:>20,} {count:>20,}")
+    if args.constant is not None:
+        pairs = complement_pair_count(histogram, args.constant)
+        print(f"Pairs with {args.metric}(P) + {args.metric}(Q) = {args.constant:,}: {pairs:,}")
+    return 0
+
+
+# ============================================================
+# Entry point
+# ============================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m domino_tiling',
+                                     description="Domino tiling verifiers.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, func, help):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('--board', type=_board_size, default=_board_size(DEFAULT_BOARD),
+                         help="board as RxC (default: %(default)s)")
+        sub.set_defaults(func=func)
+        return sub
+
+    sub = command('symmetry', cmd_symmetry, "fixed points, Burnside count and families")
+    sub.add_argument('--families', action='store_true', help="list the orbits")
+
+    sub = command('rotation', cmd_rotation, "rotation product-sum identity")
+    sub.add_argument('--degrees', type=int, choices=sorted(ROTATIONS), default=90)
+    sub.add_argument('--target', type=int, default=None,
+                     help="expected pair sum (default: that of the first tiling)")
+    sub.add_argument('--table', action='store_true', help="print every pair")
+
+    sub = command('power-sums', cmd_power_sums, "pair sums of S_sum^k over the pairing")
+    sub.add_argument('--k-max', type=int, default=4)
+    sub.add_argument('--table', action='store_true', help="print every pair")
+
+    sub = command('prod-square', cmd_prod_square, "pair sums of S_prod^2 over the pairing")
+    sub.add_argument('--table', action='store_true', help="print every pair")
+
+    sub = command('partition', cmd_partition, "perfect complementary partitions")
+    sub.add_argument('--list', action='store_true', help="stream every partition")
+    sub.add_argument('--limit', type=int, default=None)
+
+    sub = command('enumerate', cmd_enumerate, "list or count the tilings")
+    sub.add_argument('--count', action='store_true', help="only print the number of tilings")
+    sub.add_argument('--check', action='store_true',
+                     help="compare the number of tilings with Kasteleyn's count (loads NumPy)")
+    sub.add_argument('--limit', type=int, default=None)
+
+    sub = command('histogram', cmd_histogram, "exact metric distribution by transfer matrix")
+    sub.add_argument('--metric', default='s_prod', help="s_prod, s_prod2 or s_sumK")
+    sub.add_argument('--constant', type=int, default=None,
+                     help="count the pairs whose values add up to this")
+    sub.add_argument('--list', action='store_true', help="print every value and its count")
+    return parser
+
+
+def main(argv=None):
+    from . import stats
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    stats.configure(argv)
+    args = build_parser().parse_args(argv)
+    with stats.stage(args.command):
+        return args.func(args)
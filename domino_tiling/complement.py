@@ -0,0 +1,153 @@
+"""
+Complement Search by Hash Join
+==============================
+Two tilings Pi, Pj form a valid (complementary) pair when, for every metric
+m in a chosen list, m(Pi) + m(Pj) equals a fixed constant C_m.
+
+Instead of testing all C(N, 2) pairs, every tiling's metric vector v is
+joined against the complement key C - v: the metric rows are grouped by
+value into a sorted index, each group's complement key is located by binary
+search, and the matching groups are expanded into pairs. The work is
+O(N log N) for the index plus the size of the output.
+
+Comparisons are exact integer equality. Metric tables that do not fit in
+int64 (see metrics.OVERFLOW_LIMIT) are joined through a Python dict of
+exact big-int keys instead.
+"""
+
+import numpy as np
+
+from . import stats
+from .metrics import OVERFLOW_LIMIT, exact_add
+
+# The 18 algebraic symmetric pairs of Calculator2/3 (0-based tiling IDs).
+PAPER_PAIRINGS_4X4 = [
+    (i - 1, j - 1) for i, j in (
+        (1, 36), (8, 24), (11, 21), (15, 26), (3, 34), (9, 18),
+        (19, 23), (6, 31), (5, 32), (13, 28), (2, 35), (4, 33),
+        (12, 29), (16, 25), (7, 30), (10, 17), (14, 27), (20, 22))
+]
+
+# The four identities of the paper on the 4x4 natural square.
+PAPER_CONSTANTS_4X4 = {
+    's_sum1': 272,
+    's_sum2': 5848,
+    's_sum3': 141032,
+    's_prod': 1428,
+}
+
+
+def _row_keys(table):
+    """Views each row of an (N, M) int64 table as one opaque sortable key."""
+    table = np.ascontiguousarray(table, dtype=np.int64)
+    return table.view(np.dtype((np.void, table.dtype.itemsize * table.shape[1]))).ravel()
+
+
+def _fits_int64(table, constants):
+    if table.dtype == object or constants.dtype == object:
+        return False
+    largest = max(float(np.abs(table).max(initial=0)), float(np.abs(constants).max(initial=0)))
+    return 2 * largest < OVERFLOW_LIMIT
+
+
+def _python_complement_pairs(table, constants):
+    """Exact hash join with Python int keys, for tables beyond int64."""
+    constants = tuple(int(c) for c in constants)
+    groups = {}
+    for i, row in enumerate(table.tolist()):
+        groups.setdefault(tuple(int(v) for v in row), []).append(i)
+    pairs = []
+    for key, members in groups.items():
+        partners = groups.get(tuple(c - v for c, v in zip(constants, key)), ())
+        pairs.extend((i, j) for i in members for j in partners if i < j)
+    pairs.sort()
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def complement_pairs(table, constants):
+    """
+    Returns an (E, 2) array of all index pairs (i, j), i < j, such that
+    table[i] + table[j] == constants row-wise. `table` is (N, M) integer.
+    """
+    with stats.stage('complement'):
+        pairs = _complement_pairs(table, constants)
+    stats.count('complement_probes', len(table))
+    stats.count('valid_pairs', len(pairs))
+    return pairs
+
+
+def _complement_pairs(table, constants):
+    table = np.asarray(table)
+    constants = np.asarray(constants)
+    if table.ndim != 2 or table.shape[1] != constants.shape[0]:
+        raise ValueError("Metric table and constants do not match.")
+    if len(table) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    if not _fits_int64(table, constants):
+        return _python_complement_pairs(table, constants)
+    table = table.astype(np.int64, copy=False)
+    constants = constants.astype(np.int64)
+
+    # Sorted index: unique metric vectors and the members of each group.
+    groups, inverse = np.unique(_row_keys(table), return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(inverse, minlength=len(groups)))])
+
+    # Probe: one complement key per group.
+    group_rows = table[order[bounds[:-1]]]
+    probe = _row_keys(constants - group_rows)
+    hit = np.searchsorted(groups, probe)
+    hit[hit == len(groups)] = 0
+    found = groups[hit] == probe
+
+    sizes = np.diff(bounds)
+    index = np.arange(len(groups))
+
+    # Cross-group matches (v != C - v): expand every group product at once.
+    g = np.nonzero(found & (hit > index))[0]
+    h = hit[g]
+    counts = sizes[g] * sizes[h]
+    owner = np.repeat(np.arange(len(g)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    left = order[bounds[g][owner] + k // sizes[h][owner]]
+    right = order[bounds[h][owner] + k % sizes[h][owner]]
+    pairs = [np.stack([left, right], axis=1)]
+
+    # Self-complementary groups (2v = C): all pairs within the group.
+    for g in np.nonzero(found & (hit == index))[0]:
+        members = order[bounds[g]:bounds[g + 1]]
+        i, j = np.triu_indices(len(members), k=1)
+        pairs.append(np.stack([members[i], members[j]], axis=1))
+
+    pairs = np.sort(np.concatenate(pairs).astype(np.int64), axis=1)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def metric_complement_pairs(metrics, constants):
+    """
+    Hash-join over a metrics dict (see metrics.py); `constants` maps metric
+    name -> pair-sum constant, e.g. PAPER_CONSTANTS_4X4.
+    """
+    names = list(constants)
+    table = np.stack([metrics[name] for name in names], axis=1)
+    return complement_pairs(table, [constants[name] for name in names])
+
+
+def pair_sum_verdicts(metric, pairs):
+    """
+    Checks whether metric[i] + metric[j] is the same for every pair, under
+    every weighting. `metric` is (W, N) (or (N,) for one weighting) and
+    `pairs` is (E, 2). Returns a dict of (W,) arrays:
+      'holds'    - True where all pair sums agree,
+      'constant' - the pair sum of the first pair,
+      'spread'   - max minus min pair sum (0 exactly when 'holds').
+    """
+    metric = np.atleast_2d(np.asarray(metric))
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    sums = exact_add(metric[:, pairs[:, 0]], metric[:, pairs[:, 1]])
+    if sums.shape[1] == 0:
+        zeros = np.zeros(len(metric), dtype=metric.dtype)
+        return {'holds': np.ones(len(metric), dtype=bool), 'constant': zeros, 'spread': zeros}
+    spread = sums.max(axis=1) - sums.min(axis=1)
+    return {'holds': spread == 0, 'constant': sums[:, 0], 'spread': spread}
@@ -0,0 +1,166 @@
+"""
+Discovery of Complementary Identities among Polynomial Block Functionals
+========================================================================
+Every symmetric polynomial block functional of degree <= d is a linear
+combination of the features
+
+    F_(a,b)(P) = Sum over dominoes (x^a y^b + x^b y^a)     (a < b)
+    F_(a,a)(P) = Sum over dominoes  x^a y^a
+
+with a + b <= d. S_sum^k, S_prod and S_prod^2 are all such combinations.
+For a pairing {(Pi, Pj)}, a combination c has a constant pair sum exactly
+when
+
+    (F(Pi) + F(Pj) - F(Pi0) - F(Pj0)) . c = 0     for every pair,
+
+so all complementary identities of degree <= d are the rational nullspace
+of one integer matrix. Combinations that are constant on *every* tiling
+(e.g. the domino count, or S_sum^1 = total weight) are trivially
+complementary and can be factored out.
+"""
+
+from fractions import Fraction
+from math import gcd
+
+import numpy as np
+
+from .metrics import natural_weights
+
+
+def monomial_labels(degree):
+    """Feature labels (a, b), a <= b, a + b <= degree, by degree then a."""
+    return [(a, total - a) for total in range(degree + 1)
+            for a in range(total // 2 + 1)]
+
+
+def monomial_features(dominoes, weights, degree):
+    """
+    (labels, F): F is an (N, M) object array of exact Python ints holding
+    every symmetric monomial feature of every tiling.
+    """
+    weights = np.asarray(weights).reshape(-1).astype(object)
+    dominoes = np.asarray(dominoes)
+    x = weights[dominoes[..., 0]]
+    y = weights[dominoes[..., 1]]
+    labels = monomial_labels(degree)
+    columns = []
+    for a, b in labels:
+        block = x ** a * y ** b
+        if a != b:
+            block = block + x ** b * y ** a
+        columns.append(block.sum(axis=1))
+    return labels, np.stack(columns, axis=1) if columns else np.zeros((len(dominoes), 0), dtype=object)
+
+
+# ============================================================
+# Exact rational linear algebra
+# ============================================================
+
+def _rref(rows, n_cols):
+    """Reduced row echelon form over Q. Returns (rows, pivot columns)."""
+    a = [[Fraction(v) for v in row] for row in rows]
+    pivots = []
+    r = 0
+    for col in range(n_cols):
+        pivot = next((i for i in range(r, len(a)) if a[i][col] != 0), None)
+        if pivot is None:
+            continue
+        a[r], a[pivot] = a[pivot], a[r]
+        lead = a[r][col]
+        a[r] = [v / lead for v in a[r]]
+        for i in range(len(a)):
+            if i != r and a[i][col] != 0:
+                factor = a[i][col]
+                a[i] = [v - factor * w for v, w in zip(a[i], a[r])]
+        pivots.append(col)
+        r += 1
+    return a[:r], pivots
+
+
+def _primitive(vector):
+    """Scales a rational vector to coprime integers with a positive lead."""
+    denominator = 1
+    for v in vector:
+        denominator = denominator * v.denominator // gcd(denominator, v.denominator)
+    ints = [int(v * denominator) for v in vector]
+    common = 0
+    for v in ints:
+        common = gcd(common, v)
+    ints = [v // common for v in ints] if common else ints
+    lead = next((v for v in ints if v), 1)
+    return [-v for v in ints] if lead < 0 else ints
+
+
+def rational_nullspace(rows, n_cols):
+    """Integer basis of {c : rows . c = 0} over Q."""
+    reduced, pivots = _rref(rows, n_cols)
+    free = [c for c in range(n_cols) if c not in pivots]
+    basis = []
+    for f in free:
+        vector = [Fraction(0)] * n_cols
+        vector[f] = Fraction(1)
+        for row, p in zip(reduced, pivots):
+            vector[p] = -row[f]
+        basis.append(_primitive(vector))
+    return basis
+
+
+def _rank(rows, n_cols):
+    return len(_rref(rows, n_cols)[1]) if rows else 0
+
+
+# ============================================================
+# Discovery
+# ============================================================
+
+def discover_pair_identities(dominoes, pairs, weights=None, degree=3,
+                             exclude_trivial=True):
+    """
+    Finds a basis of all symmetric polynomial block functionals of degree
+    <= `degree` whose pair sum is constant over `pairs`. Returns a list of
+    dicts {'coefficients': {(a, b): c}, 'constant': pair sum}.
+
+    With exclude_trivial, combinations constant on every tiling are
+    factored out, so only genuinely complementary identities remain.
+
+    `weights` defaults to the natural weighting 1..cells, which depends
+    only on the number of cells (two per domino).
+    """
+    dominoes = np.asarray(dominoes)
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+    if len(pairs) == 0:
+        raise ValueError("Identity discovery needs at least one pair.")
+    if weights is None:
+        weights = natural_weights(1, 2 * dominoes.shape[1])
+    labels, features = monomial_features(dominoes, weights, degree)
+    sums = features[pairs[:, 0]] + features[pairs[:, 1]]
+    n_cols = len(labels)
+    basis = rational_nullspace((sums[1:] - sums[0]).tolist(), n_cols)
+
+    if exclude_trivial:
+        trivial = rational_nullspace((features[1:] - features[0]).tolist(), n_cols)
+        kept, span = [], list(trivial)
+        for vector in basis:
+            if _rank(span + [vector], n_cols) > _rank(span, n_cols):
+                span.append(vector)
+                kept.append(vector)
+        basis = kept
+
+    identities = []
+    for vector in basis:
+        constant = sum(int(c) * int(v) for c, v in zip(vector, sums[0]))
+        identities.append({
+            'coefficients': {label: c for label, c in zip(labels, vector) if c},
+            'constant': constant,
+        })
+    return identities
+
+
+def format_identity(identity):
+    """Human-readable form, e.g. '2*F(0,2) - 1*F(1,1) = 5848'."""
+    terms = []
+    for (a, b), c in identity['coefficients'].items():
+        sign = '-' if c < 0 else '+'
+        terms.append(f"{sign} {abs(c)}*F({a},{b})")
+    text = ' '.join(terms).lstrip('+ ')
+    return f"{text} = {identity['constant']:,}"
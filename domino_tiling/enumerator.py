@@ -0,0 +1,81 @@
+"""
+Streaming Enumeration of Domino Tilings
+=======================================
+Yields every domino tiling of an m x n board by a depth-first walk over the
+broken-profile transfer matrix (see transfer.py). States with no completion
+are pruned in advance, so every branch taken ends in a tiling and the walk
+never backtracks out of a dead end.
+
+Dominoes are emitted in the order their first cell is met in row-major order,
+which is exactly the first-encounter relabelling performed by `normalize`
+(calculator0) and `normalize_pattern_str` (Calculator1). Tilings come out in
+lexicographic order of that canonical form, so on the 4x4 board the i-th
+tiling yielded is pattern P(i+1) of the paper.
+
+Only the current path is kept in memory; the walk is a generator.
+"""
+
+from .transfer import HORIZONTAL, completion_counts, profile_moves
+
+
+def _pruned_moves(rows, cols):
+    """Transfer moves restricted to states that can still be completed."""
+    moves = profile_moves(rows, cols)
+    counts = completion_counts(rows, cols, moves)
+    return {
+        state: [(o, q, m) for o, q, m in options if counts[(q, m)]]
+        for state, options in moves.items()
+        if counts[state]
+    }
+
+
+def iter_dominoes(rows, cols):
+    """
+    Yields each tiling as a tuple of dominoes (a, b), where a < b are
+    row-major cell indices. Dominoes appear in canonical label order.
+    """
+    if rows * cols % 2:
+        return
+    moves = _pruned_moves(rows, cols)
+    n_cells = rows * cols
+    dominoes = []
+    # Each frame is [p, mask, index of the next move to try]; every frame
+    # except the root corresponds to the domino on top of `dominoes`.
+    stack = [[0, 0, 0]]
+    while stack:
+        frame = stack[-1]
+        p, mask, i = frame
+        options = moves[(p, mask)] if p < n_cells else ()
+        if p == n_cells:
+            yield tuple(dominoes)
+        if i == len(options):
+            stack.pop()
+            if stack:
+                dominoes.pop()
+            continue
+        frame[2] = i + 1
+        orientation, q, m = options[i]
+        dominoes.append((p, p + 1 if orientation == HORIZONTAL else p + cols))
+        stack.append([q, m, 0])
+
+
+def to_label_grid(dominoes, rows, cols):
+    """Converts a domino tuple to a canonical tuple-of-tuples label grid."""
+    cells = [0] * (rows * cols)
+    for label, (a, b) in enumerate(dominoes):
+        cells[a] = label
+        cells[b] = label
+    return tuple(tuple(cells[r * cols:(r + 1) * cols]) for r in range(rows))
+
+
+def to_pattern_str(dominoes, rows, cols):
+    """Converts a domino tuple to a letter string ("AABB...") as in Calculator1."""
+    return "".join(chr(ord('A') + label)
+                   for row in to_label_grid(dominoes, rows, cols)
+                   for label in row)
+
+
+def iter_tilings(rows, cols):
+    """Yields every tiling of a rows x cols board as a canonical label grid."""
+    for dominoes in iter_dominoes(rows, cols):
+        yield to_label_grid(dominoes, rows, cols)
@@ -0,0 +1,195 @@
+"""
+Sparse Flip Graph in CSR Form
+=============================
+Nodes are the tilings of a TilingSet; two tilings are adjacent when they
+differ by one 2x2 flip (see flips.py). In the horizontal-edge encoding a
+flip at block p, in either direction, toggles exactly bits p and p + cols,
+so the neighbours of a chunk of tilings are its packed keys XORed with one
+constant per flippable block, looked up in the canonical index.
+
+The graph is stored as compressed sparse rows: `indptr` (N + 1 int64
+offsets) and `indices` (int32 neighbour IDs, ascending block order per
+row). A first pass computes the degrees from the flippable blocks alone;
+the second fills `indices` chunk by chunk, optionally straight into a
+memory-mapped .npy file, so the 12,988,816-node 8x8 graph is never held
+twice.
+
+Breadth-first search expands a whole frontier per step with array
+gathers. With several sources it returns the distance to the nearest one
+(and which one), which gives flip distances between complementary pairs
+and the diameters of D4 families.
+"""
+
+import numpy as np
+
+from . import stats
+from .tilingset import WORD_BITS, n_words
+
+DEFAULT_CHUNK = 1 << 18
+UNREACHED = -1
+
+
+def block_cells(rows, cols):
+    """Top-left cells p of the 2x2 blocks, ascending."""
+    return np.array([r * cols + c for r in range(rows - 1) for c in range(cols - 1)],
+                    dtype=np.int64)
+
+
+def flip_words(rows, cols):
+    """(B, W) uint64 XOR masks toggling bits p and p + cols of every block."""
+    blocks = block_cells(rows, cols)
+    words = np.zeros((len(blocks), n_words(rows, cols)), dtype=np.uint64)
+    for b, p in enumerate(blocks):
+        for cell in (p, p + cols):
+            words[b, cell // WORD_BITS] |= np.uint64(1 << (cell % WORD_BITS))
+    return words
+
+
+def _flippable(tilings, blocks):
+    """(n, B) bool: block b of tiling i holds two parallel dominoes."""
+    cols = tilings.cols
+    horizontal = tilings.horizontal_cells()
+    vertical = tilings.vertical_cells(horizontal)
+    return ((horizontal[:, blocks] & horizontal[:, blocks + cols])
+            | (vertical[:, blocks] & vertical[:, blocks + 1]))
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenated neighbour lists of `nodes`."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+
+class FlipGraph:
+    """CSR adjacency of the flip graph of a TilingSet."""
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def __repr__(self):
+        return f"FlipGraph({len(self)} nodes, {self.n_edges} edges)"
+
+    @property
+    def n_edges(self):
+        return len(self.indices) // 2
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, node):
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def edges(self):
+        """(E, 2) int64 array of edges (i, j), i < j."""
+        source = np.repeat(np.arange(len(self), dtype=np.int64), self.degrees())
+        keep = source < self.indices
+        return np.stack([source[keep], self.indices[keep].astype(np.int64)], axis=1)
+
+    # --------------------------------------------------------
+    # Breadth-first search
+    # --------------------------------------------------------
+
+    def bfs(self, sources, max_depth=None, targets=None, return_sources=False):
+        """
+        Multi-source BFS. Returns the (N,) int32 distance from the nearest
+        source (-1 where unreached) and, with return_sources, the (N,) ID of
+        that source. The search stops after `max_depth` levels, or once every
+        node in `targets` has been reached.
+        """
+        sources = np.unique(np.asarray(sources, dtype=np.int64).reshape(-1))
+        distance = np.full(len(self), UNREACHED, dtype=np.int32)
+        origin = np.full(len(self), UNREACHED, dtype=np.int64) if return_sources else None
+        distance[sources] = 0
+        if return_sources:
+            origin[sources] = sources
+        targets = None if targets is None else np.asarray(targets, dtype=np.int64).reshape(-1)
+        frontier = sources
+        depth = 0
+        while len(frontier) and (max_depth is None or depth < max_depth):
+            if targets is not None and np.all(distance[targets] >= 0):
+                break
+            depth += 1
+            counts = self.indptr[frontier + 1] - self.indptr[frontier]
+            reached = _gather(self.indptr, self.indices, frontier)
+            fresh = distance[reached] == UNREACHED
+            reached = reached[fresh]
+            # np.unique keeps the first occurrence, i.e. the lowest frontier
+            # node, so ties between sources resolve deterministically.
+            reached, first = np.unique(reached, return_index=True)
+            distance[reached] = depth
+            if return_sources:
+                parents = np.repeat(frontier, counts)[fresh][first]
+                origin[reached] = origin[parents]
+            frontier = reached.astype(np.int64)
+            stats.count('bfs_nodes', len(frontier))
+        if return_sources:
+            return distance, origin
+        return distance
+
+    def distance(self, a, b):
+        """Flip distance between two tilings (-1 if disconnected)."""
+        return int(self.bfs([a], targets=[b])[b])
+
+    def pair_distances(self, pairs):
+        """(E,) flip distances of pairs (i, j), one BFS per distinct i."""
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        result = np.empty(len(pairs), dtype=np.int32)
+        for source in np.unique(pairs[:, 0]):
+            rows = np.nonzero(pairs[:, 0] == source)[0]
+            result[rows] = self.bfs([source], targets=pairs[rows, 1])[pairs[rows, 1]]
+        return result
+
+    def set_diameter(self, nodes):
+        """Largest flip distance between two members of `nodes` (e.g. a D4 family)."""
+        nodes = np.asarray(nodes, dtype=np.int64).reshape(-1)
+        if len(nodes) < 2:
+            return 0
+        return int(max(self.bfs([u], targets=nodes)[nodes].max() for u in nodes[:-1]))
+
+    def eccentricity(self, node):
+        return int(self.bfs([node]).max())
+
+
+def build_flip_graph(tilings, chunk_size=DEFAULT_CHUNK, out=None):
+    """
+    FlipGraph of a TilingSet. `out` may be a path, in which case `indices`
+    is written to a memory-mapped .npy file. Neighbours missing from an
+    incomplete set are left out.
+    """
+    rows, cols = tilings.rows, tilings.cols
+    blocks = block_cells(rows, cols)
+    xor = flip_words(rows, cols)
+    with stats.stage('flip_graph'):
+        degrees = np.concatenate(
+            [_flippable(chunk, blocks).sum(axis=1) for chunk in tilings.chunks(chunk_size)]
+            + [np.zeros(0, dtype=np.int64)]).astype(np.int64)
+        indptr = np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64)
+        if out is None:
+            indices = np.empty(indptr[-1], dtype=np.int32)
+        else:
+            indices = np.lib.format.open_memmap(out, mode='w+', dtype=np.int32,
+                                                shape=(int(indptr[-1]),))
+        index = tilings.index
+        for start, chunk in zip(range(0, len(tilings), chunk_size),
+                                tilings.chunks(chunk_size)):
+            row, block = np.nonzero(_flippable(chunk, blocks))
+            ids = index.lookup(chunk.words[row] ^ xor[block])
+            indices[indptr[start]:indptr[start + len(chunk)]] = ids
+        missing = np.nonzero(indices < 0)[0]
+        if len(missing):
+            owners = np.searchsorted(indptr, missing, side='right') - 1
+            degrees -= np.bincount(owners, minlength=len(tilings))
+            indices = np.delete(indices, missing)
+            indptr = np.concatenate([[0], np.cumsum(degrees)]).astype(np.int64)
+    stats.count('flip_edges', len(indices) // 2)
+    return FlipGraph(indptr, indices)
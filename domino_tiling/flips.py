@@ -0,0 +1,200 @@
+"""
+Flip-Graph Walk with Incremental Metrics
+========================================
+Two tilings are neighbours in the flip graph when they differ in one 2x2
+block: two horizontal dominoes there are replaced by two vertical ones, or
+back. With cell weights a, b (top row) and c, d (bottom row) of the block,
+the flip H -> V changes every block-functional metric by
+
+    delta = f(a, c) + f(b, d) - f(a, b) - f(c, d)
+
+(and V -> H by -delta), so once the deltas of every block position are
+tabulated, keeping S_sum^k, S_prod, S_prod^2 and any registered functional
+up to date costs O(1) per flip, independent of the board size.
+
+`FlipWalker` visits every tiling of a rectangle exactly once by reverse
+search (Avis-Fukuda) over a spanning tree of the flip graph. Flips are
+oriented by the height function: H -> V is an "up" flip at blocks whose
+top-left cell has even r + c, a "down" flip at the others. The tilings form
+a distributive lattice under these flips (Thurston), so exactly one tiling
+has no down flip. The parent of any other tiling is the tiling reached by
+its lowest-positioned down flip, and the walk descends from that root
+through the children, the up flips whose result names it as parent.
+
+A tiling is held as two cell bitmasks, horizontal-domino starts (the mask
+of tilingset.py) and vertical-domino starts. A flip at block p XORs two bits
+into each, and the flippable blocks are whole-mask AND/shift expressions.
+Memory is the DFS stack: the mask of untried candidate flips per tree
+level.
+"""
+
+from . import stats
+from .enumerator import iter_dominoes
+from .metrics import BLOCK_FUNCTIONALS, natural_weights
+
+DEFAULT_METRICS = ('s_sum1', 's_sum2', 's_sum3', 's_prod', 's_prod2')
+
+
+def _lowest(mask):
+    """Index of the lowest set bit of a non-zero mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+def block_function(name):
+    """f(x, y) of a metric on Python ints: S_sum^k by name, or a registered functional."""
+    if name.startswith('s_sum'):
+        k = int(name[len('s_sum'):])
+        return lambda x, y: (x + y) ** k
+    func = BLOCK_FUNCTIONALS[name]
+    return lambda x, y: int(func(x, y))
+
+
+class FlipWalker:
+    """
+    Reverse-search walk over all tilings of a rows x cols board, keeping
+    `values` (metric name -> current value, exact Python ints) updated with
+    one table lookup per metric per flip.
+    """
+
+    def __init__(self, rows, cols, weights=None, metrics=DEFAULT_METRICS):
+        self.rows = rows
+        self.cols = cols
+        if weights is None:
+            weights = natural_weights(rows, cols)
+        self.weights = [int(w) for w in weights]
+        self.names = tuple(metrics)
+        self._functions = [block_function(name) for name in self.names]
+
+        n_cells = rows * cols
+        # Top-left cells of 2x2 blocks, and the cells with even r + c.
+        self._blocks = 0
+        self._even = 0
+        for p in range(n_cells):
+            r, c = divmod(p, cols)
+            if c < cols - 1 and r < rows - 1:
+                self._blocks |= 1 << p
+            if (r + c) % 2 == 0:
+                self._even |= 1 << p
+        self._odd = ((1 << n_cells) - 1) ^ self._even
+        # _deltas[p][m]: change of metric m under the flip H -> V at block p.
+        self._deltas = {p: self._block_deltas(p) for p in range(n_cells)
+                        if self._blocks >> p & 1}
+        self.flips = 0
+        self.horizontal = 0
+        self.vertical = 0
+        self.values = {}
+
+    def _block_deltas(self, p):
+        w, cols = self.weights, self.cols
+        a, b, c, d = w[p], w[p + 1], w[p + cols], w[p + cols + 1]
+        return tuple(f(a, c) + f(b, d) - f(a, b) - f(c, d) for f in self._functions)
+
+    # --------------------------------------------------------
+    # Tiling state
+    # --------------------------------------------------------
+
+    def _load(self, dominoes):
+        """Sets the current tiling and evaluates every metric once from scratch."""
+        self.horizontal = self.vertical = 0
+        totals = [0] * len(self.names)
+        for a, b in dominoes:
+            if b == a + 1 and self.cols > 1:
+                self.horizontal |= 1 << a
+            else:
+                self.vertical |= 1 << a
+            x, y = self.weights[a], self.weights[b]
+            for m, f in enumerate(self._functions):
+                totals[m] += f(x, y)
+        self.values = dict(zip(self.names, totals))
+
+    def _flippable(self):
+        """(horizontal, vertical) masks of blocks holding two parallel dominoes."""
+        h, v, cols = self.horizontal, self.vertical, self.cols
+        return (h & (h >> cols) & self._blocks,
+                v & (v >> 1) & self._blocks)
+
+    def up_flips(self):
+        h, v = self._flippable()
+        return (h & self._even) | (v & self._odd)
+
+    def down_flips(self):
+        h, v = self._flippable()
+        return (h & self._odd) | (v & self._even)
+
+    def _toggle(self, p):
+        """Flips block p in the masks only."""
+        self.horizontal ^= (1 << p) | (1 << (p + self.cols))
+        self.vertical ^= (1 << p) | (1 << (p + 1))
+
+    def _update(self, p, sign):
+        values = self.values
+        for name, delta in zip(self.names, self._deltas[p]):
+            values[name] += sign * delta
+        self.flips += 1
+
+    def flip(self, p):
+        """Flips block p (which must hold two parallel dominoes)."""
+        sign = 1 if self.horizontal >> p & 1 else -1
+        self._toggle(p)
+        self._update(p, sign)
+
+    def descend_to_root(self):
+        """Applies down flips until none is left; the result is the lattice minimum."""
+        down = self.down_flips()
+        while down:
+            self.flip(_lowest(down))
+            down = self.down_flips()
+
+    # --------------------------------------------------------
+    # Walk
+    # --------------------------------------------------------
+
+    def walk(self):
+        """
+        Yields the horizontal-edge bitmask of every tiling exactly once; while
+        a mask is current, `values` holds that tiling's metrics.
+        """
+        first = next(iter_dominoes(self.rows, self.cols), None)
+        if first is None:
+            return
+        self._load(first)
+        self.descend_to_root()
+        self.flips = 0
+        yield self.horizontal
+
+        stack = []
+        candidates = self.up_flips()
+        while True:
+            while candidates:
+                q = _lowest(candidates)
+                candidates ^= 1 << q
+                # Up flips are H -> V exactly at blocks with even r + c.
+                sign = 1 if self._even >> q & 1 else -1
+                self._toggle(q)
+                if _lowest(self.down_flips()) == q:
+                    self._update(q, sign)
+                    stack.append(candidates)
+                    yield self.horizontal
+                    candidates = self.up_flips()
+                else:
+                    self._toggle(q)
+            if not stack:
+                stats.count('flips', self.flips)
+                break
+            # Back to the parent: undo the lowest down flip, which is the one
+            # that led here.
+            self.flip(_lowest(self.down_flips()))
+            candidates = stack.pop()
+
+    def collect(self):
+        """
+        Walks the whole board. Returns (masks, values) with values a dict
+        name -> list of Python ints, both in walk order.
+        """
+        masks = []
+        columns = {name: [] for name in self.names}
+        for mask in self.walk():
+            masks.append(mask)
+            for name, value in self.values.items():
+                columns[name].append(value)
+        return masks, columns
@@ -0,0 +1,110 @@
+"""
+Exact Metric Histograms by Transfer Matrix
+==========================================
+An additive domino functional M(T) = Sum f(w_a, w_b) over the dominoes (a, b)
+of a tiling (S_prod, S_sum^k, S_prod^2 or any registered block functional)
+grows by one term per domino placed. Running the broken-profile transfer
+matrix of transfer.py with a sparse polynomial per profile, value -> number of
+partial tilings reaching it, therefore yields the exact histogram of M over
+all tilings without enumerating a single one.
+
+Each polynomial is a pair of arrays (sorted values, counts), and merging is a
+sort plus np.add.reduceat. Counts stay int64 while the tiling count fits,
+values while their bound does, and switch to Python ints otherwise. The
+profile runs along the narrower side. The transposed board sees its
+dominoes with the same (a, b) order, so asymmetric functionals are safe.
+
+Time and memory grow with the number of (profile, value) terms, so
+functionals with few distinct values go furthest: S_prod on 16x16 has 65
+values, while S_prod^2 has 315,982 already on 10x10.
+
+The number of complementary pairs for a constant C follows from the
+histogram alone: Sum_v count(v) count(C - v) ordered pairs.
+"""
+
+import numpy as np
+
+from . import stats
+from .flips import block_function
+from .metrics import natural_weights
+from .kasteleyn import kasteleyn_count
+
+INT64_LIMIT = 2 ** 62
+
+
+def _merge(parts, dtype):
+    """Adds the polynomials in `parts` [(values, counts), ...]."""
+    if len(parts) == 1:
+        return parts[0]
+    values = np.concatenate([v for v, _ in parts])
+    counts = np.concatenate([c for _, c in parts])
+    order = np.argsort(values, kind='stable')
+    values, counts = values[order], counts[order]
+    starts = np.flatnonzero(np.concatenate([[True], values[1:] != values[:-1]]))
+    return values[starts], np.add.reduceat(counts, starts).astype(dtype, copy=False)
+
+
+def histogram_arrays(rows, cols, name='s_prod', weights=None):
+    """
+    (values, counts) arrays of the exact histogram of metric `name` (a metric
+    name or a callable f(x, y) on Python ints) over every tiling.
+    """
+    if weights is None:
+        weights = natural_weights(rows, cols)
+    func = block_function(name) if isinstance(name, str) else name
+    grid = np.asarray([int(w) for w in weights], dtype=object).reshape(rows, cols)
+    if cols > rows:
+        rows, cols, grid = cols, rows, grid.T
+    w = list(grid.reshape(-1))
+    n_cells = rows * cols
+
+    # Only picks the count dtype; the Kasteleyn determinant takes
+    # milliseconds where a transfer count would repeat the whole sweep.
+    total = kasteleyn_count(rows, cols)
+    steps = [(func(w[p], w[p + 1]) if p % cols + 1 < cols else None,
+              func(w[p], w[p + cols]) if p + cols < n_cells else None)
+             for p in range(n_cells)]
+    bound = sum(max(abs(d) for d in step if d is not None)
+                for step in steps if step != (None, None))
+    value_dtype = np.int64 if bound < INT64_LIMIT else object
+    count_dtype = np.int64 if total < INT64_LIMIT else object
+
+    top = 1 << (cols - 1)
+    states = {0: (np.zeros(1, dtype=value_dtype), np.ones(1, dtype=count_dtype))}
+    with stats.stage('histogram'):
+        for p in range(n_cells):
+            horizontal, vertical = steps[p]
+            incoming = {}
+            for mask, (values, counts) in states.items():
+                if mask & 1:
+                    incoming.setdefault(mask >> 1, []).append((values, counts))
+                    continue
+                if horizontal is not None and not mask & 2:
+                    incoming.setdefault((mask >> 1) | 1, []).append((values + horizontal, counts))
+                if vertical is not None:
+                    incoming.setdefault((mask >> 1) | top, []).append((values + vertical, counts))
+            states = {mask: _merge(parts, count_dtype) for mask, parts in incoming.items()}
+            stats.count('histogram_terms', sum(len(v) for v, _ in states.values()))
+    if 0 not in states:
+        return np.zeros(0, dtype=value_dtype), np.zeros(0, dtype=count_dtype)
+    return states[0]
+
+
+def metric_histogram(rows, cols, name='s_prod', weights=None):
+    """Exact histogram of a metric over all tilings, as a dict value -> count."""
+    values, counts = histogram_arrays(rows, cols, name, weights)
+    return {int(v): int(n) for v, n in zip(values, counts)}
+
+
+def complement_pair_count(histogram, constant, ordered=False):
+    """
+    Number of pairs of tilings whose metric values add up to `constant`.
+    Ordered pairs (P, Q), P = Q allowed, are Sum_v count(v) count(C - v);
+    by default the unordered pairs of distinct tilings are returned.
+    """
+    total = sum(n * histogram.get(constant - v, 0) for v, n in histogram.items())
+    if ordered:
+        return total
+    if constant % 2 == 0:
+        total -= histogram.get(constant // 2, 0)
+    return total // 2
@@ -0,0 +1,99 @@
+"""
+Canonical-Key Index: Tiling -> ID
+=================================
+The packed horizontal-edge bitmask of tilingset.py does not depend on how
+the dominoes are labelled, so it already is a canonical key: two label grids
+describe the same tiling exactly when they encode to the same mask. That
+replaces the normalize-and-compare step of `find_rotated_pair_id`
+(Calculator1) and `NORM_PATTERNS.index` (calculator0).
+
+The index answers
+  * single lookups in O(1) through a dict built on first use, and
+  * batch lookups of whole key arrays through a sorted copy of the keys
+    (one vectorized binary search per batch).
+Missing keys map to -1. When the keys are already stored in ascending
+order (e.g. a sorted store file, see store.py) the sort and its copy are
+skipped and the keys are searched in place.
+"""
+
+import numpy as np
+
+from . import stats
+from .tilingset import encode_label_grid, mask_to_words
+
+MISSING = -1
+
+
+def _void_keys(words):
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return words.view(np.dtype((np.void, words.dtype.itemsize * words.shape[1]))).ravel()
+
+
+class CanonicalIndex:
+    """Maps canonical keys of a TilingSet to tiling IDs (row positions)."""
+
+    def __init__(self, tilings, assume_sorted=False):
+        self.tilings = tilings
+        words = tilings.words
+        self._single = words.shape[1] == 1
+        keys = words[:, 0] if self._single else _void_keys(words)
+        if assume_sorted:
+            self._order = None
+            self._sorted = keys
+        else:
+            with stats.stage('canonical_index'):
+                self._order = np.argsort(keys, kind='stable')
+                self._sorted = keys[self._order]
+        self._dict = None
+
+    def __len__(self):
+        return len(self.tilings)
+
+    # --------------------------------------------------------
+    # Single lookups
+    # --------------------------------------------------------
+
+    def _lookup_dict(self):
+        if self._dict is None:
+            self._dict = {mask: i for i, mask in enumerate(self.tilings)}
+        return self._dict
+
+    def id_of_mask(self, mask):
+        """ID of the tiling with the given Python int bitmask, or -1."""
+        return self._lookup_dict().get(mask, MISSING)
+
+    def id_of_grid(self, grid):
+        """ID of the tiling drawn by a label grid (any labelling), or -1."""
+        return self.id_of_mask(encode_label_grid(grid))
+
+    def __contains__(self, mask):
+        return self.id_of_mask(mask) != MISSING
+
+    # --------------------------------------------------------
+    # Batch lookups
+    # --------------------------------------------------------
+
+    def lookup(self, words):
+        """
+        Vectorized lookup of an (K, W) uint64 key array (or (K,) for one-word
+        boards). Returns a (K,) int64 array of IDs, -1 where absent.
+        """
+        words = np.asarray(words, dtype=np.uint64)
+        if words.ndim == 1:
+            words = words.reshape(-1, 1)
+        keys = words[:, 0] if self._single else _void_keys(words)
+        stats.count('index_lookups', len(keys))
+        if len(self._sorted) == 0:
+            return np.full(len(keys), MISSING, dtype=np.int64)
+        pos = np.searchsorted(self._sorted, keys)
+        pos[pos == len(self._sorted)] = 0
+        hit = self._sorted[pos] == keys
+        ids = pos if self._order is None else self._order[pos]
+        return np.where(hit, ids, MISSING).astype(np.int64)
+
+    def lookup_masks(self, masks):
+        """Batch lookup of an iterable of Python int bitmasks."""
+        width = self.tilings.words.shape[1]
+        words = np.array([mask_to_words(m, width) for m in masks],
+                         dtype=np.uint64).reshape(-1, width)
+        return self.lookup(words)
@@ -0,0 +1,185 @@
+"""
+Exact Metric Moments from the Kasteleyn Matrix
+==============================================
+Give every edge e of the board the weight exp(t m_e), where m_e = f(w_a, w_b)
+is the domino term of an additive metric M (S_prod: m_e = w_a w_b). Then
+
+    Z(t) = Sum_T exp(t M(T)) = |det K(t)|,
+
+with K(t) the Kasteleyn matrix of kasteleyn.py with entries K_e exp(t m_e).
+With B = K'(0) (entries m_e K_e) and B2 = K''(0) (entries m_e^2 K_e),
+differentiating log|det K(t)| at t = 0 gives the moments over the uniform
+measure on all tilings:
+
+    P(e in T) = K_e K^-1[w_e, b_e]                 (Kenyon)
+    E[M]      = tr(K^-1 B)   = Sum_e m_e P(e)
+    Var[M]    = tr(K^-1 B2) - tr((K^-1 B)^2)
+              = Sum_e m_e^2 P(e) - Sum_{e,f} m_e m_f K_e K_f K^-1[w_e, b_f] K^-1[w_f, b_e]
+
+One inverse of the (mn/2)-square matrix serves every edge and every
+metric, so the cost is O((mn)^3) whatever the number of tilings. Small
+boards (up to EXACT_LIMIT black cells) are inverted exactly by
+fraction-free Gauss-Jordan elimination over Python ints (20x20 in about
+3 s), and the moments and occupations come out as Fractions. Larger boards
+use a float64 LAPACK inverse. 100x100 (a 5,000-square matrix) takes about
+10 s and 1 GB. The variance is evaluated on gauge-shifted edge terms and
+agrees with the exact values to ~1e-14 relative.
+"""
+
+from fractions import Fraction
+
+import numpy as np
+
+from . import stats
+from .flips import block_function
+from .kasteleyn import colour_classes, kasteleyn_edges
+from .metrics import natural_weights
+
+EXACT_LIMIT = 200
+
+
+def exact_inverse(matrix):
+    """
+    (N, d) with N an object array of Python ints and K^-1 = N / d, by
+    fraction-free Gauss-Jordan elimination on [K | I]. Each step divides
+    exactly by the previous pivot (Sylvester's identity), and at the end the
+    left block is d * I with d = +-det K.
+    """
+    a = np.array(matrix, dtype=object)
+    n = len(a)
+    m = np.concatenate([a, np.identity(n, dtype=int).astype(object)], axis=1)
+    previous = 1
+    for k in range(n):
+        nonzero = np.nonzero(m[k:, k] != 0)[0]
+        if len(nonzero) == 0:
+            raise ValueError("The Kasteleyn matrix is singular: the board has no tilings.")
+        pivot_row = k + int(nonzero[0])
+        if pivot_row != k:
+            m[[k, pivot_row]] = m[[pivot_row, k]]
+        pivot = m[k, k]
+        row = m[k].copy()
+        m = (pivot * m - np.multiply.outer(m[:, k], row)) // previous
+        m[k] = row
+        previous = pivot
+    return m[:, n:], previous
+
+
+class KasteleynMoments:
+    """
+    Edge occupations and metric moments of the uniform measure on the tilings
+    of a rows x cols board. `exact` defaults to True up to EXACT_LIMIT black
+    cells.
+    """
+
+    def __init__(self, rows, cols, exact=None):
+        if rows * cols % 2 or rows * cols == 0:
+            raise ValueError(f"A {rows}x{cols} board has no domino tilings to average over.")
+        self.rows = rows
+        self.cols = cols
+        black, white = colour_classes(rows, cols)
+        self.exact = len(black) <= EXACT_LIMIT if exact is None else exact
+        edges = kasteleyn_edges(rows, cols)
+        self._black = np.array([b for b, _, _ in edges], dtype=np.int64)
+        self._white = np.array([w for _, w, _ in edges], dtype=np.int64)
+        self._sign = np.array([s for _, _, s in edges], dtype=np.int64)
+        cells = np.stack([np.asarray(black)[self._black], np.asarray(white)[self._white]], axis=1)
+        # (E, 2) cell pairs (a, b), a < b, in the order of kasteleyn_edges.
+        self.edges = np.sort(cells, axis=1)
+
+        matrix = np.zeros((len(black), len(white)), dtype=np.int64)
+        matrix[self._black, self._white] = self._sign
+        with stats.stage('kasteleyn_inverse'):
+            if self.exact:
+                self._inverse, self._scale = exact_inverse(matrix.tolist())
+            else:
+                self._inverse, self._scale = np.linalg.inv(matrix.astype(np.float64)), 1.0
+        # K_e K^-1[w_e, b_e], still multiplied by the scale d.
+        self._occupation = self._sign * self._inverse[self._white, self._black]
+
+    def __repr__(self):
+        return (f"KasteleynMoments({self.rows}x{self.cols}, "
+                f"{'exact' if self.exact else 'float64'})")
+
+    def _divide(self, value):
+        if self.exact:
+            return Fraction(int(value), int(self._scale))
+        return float(value)
+
+    @property
+    def occupation(self):
+        """(E,) probabilities that each edge of `edges` is a domino."""
+        if self.exact:
+            return np.array([Fraction(int(p), int(self._scale)) for p in self._occupation],
+                            dtype=object)
+        return self._occupation
+
+    def edge_values(self, name='s_prod', weights=None):
+        """(E,) domino terms m_e = f(w_a, w_b) of a metric name or callable."""
+        if weights is None:
+            weights = natural_weights(self.rows, self.cols)
+        weights = [int(w) for w in weights]
+        func = block_function(name) if isinstance(name, str) else name
+        values = [func(weights[a], weights[b]) for a, b in self.edges.tolist()]
+        return np.array(values, dtype=object if self.exact else np.float64)
+
+    def mean(self, name='s_prod', weights=None):
+        m = self.edge_values(name, weights)
+        return self._divide((m * self._occupation).sum())
+
+    def _gauged(self, m):
+        """
+        m_e + phi_a + phi_b with phi = -(mean of the incident m_e) / 2. Every
+        cell is covered once, so M only moves by the constant Sum phi and the
+        variance is unchanged, but the float64 cancellation in first - second
+        shrinks with the terms (for S_prod by several orders of magnitude).
+        """
+        cells = self.rows * self.cols
+        a, b = self.edges[:, 0], self.edges[:, 1]
+        total = np.bincount(a, m, cells) + np.bincount(b, m, cells)
+        degree = np.bincount(a, minlength=cells) + np.bincount(b, minlength=cells)
+        phi = -total / degree / 2
+        return m + phi[a] + phi[b]
+
+    def variance(self, name='s_prod', weights=None):
+        m = self.edge_values(name, weights)
+        if not self.exact:
+            m = self._gauged(m)
+        first = (m * m * self._occupation).sum()
+        # X = B K^-1 (black x black); each black cell has at most one edge per
+        # direction, and kasteleyn_edges lists them in a fixed direction order.
+        n = len(self._inverse)
+        x = np.zeros((n, n), dtype=self._inverse.dtype)
+        coefficient = m * self._sign
+        for direction in self._directions():
+            x[self._black[direction]] += (coefficient[direction, None]
+                                          * self._inverse[self._white[direction]])
+        second = (x * x.T).sum()
+        if self.exact:
+            scale = int(self._scale)
+            return Fraction(int(first) * scale - int(second), scale * scale)
+        return float(first - second)
+
+    def _directions(self):
+        """Edge index arrays with at most one edge per black cell each."""
+        order = np.argsort(self._black, kind='stable')
+        starts = np.searchsorted(self._black[order], self._black[order])
+        rank = np.arange(len(order)) - starts
+        return [order[rank == k] for k in range(int(rank.max()) + 1)]
+
+    def moments(self, name='s_prod', weights=None):
+        """Dict with mean, variance and std of a metric over all tilings."""
+        mean = self.mean(name, weights)
+        variance = self.variance(name, weights)
+        return {'mean': mean, 'variance': variance, 'std': float(variance) ** 0.5}
+
+
+def metric_moments(rows, cols, name='s_prod', weights=None, exact=None):
+    """
+    Mean, variance and std of a metric over all tilings, plus `edges` and
+    their `occupation` probabilities.
+    """
+    moments = KasteleynMoments(rows, cols, exact)
+    result = moments.moments(name, weights)
+    result['edges'] = moments.edges
+    result['occupation'] = moments.occupation
+    return result
@@ -0,0 +1,210 @@
+"""
+Perfect Complementary Partitions via Component Decomposition
+============================================================
+A perfect complementary partition is a perfect matching of the valid-pair
+graph (tilings as nodes, complementary pairs as edges). A perfect matching
+of a graph is a choice of one perfect matching in each connected component,
+so
+
+    #partitions = Product over components of #matchings(component)
+
+which is how the multiplicity 12 = 3 * 2 * 2 of the paper arises (K4 has 3
+perfect matchings, K2,2 has 2, and every single-edge component has 1).
+
+Per-component counts use a memoized bitmask DP (always match the lowest
+unmatched vertex). Its state space grows exponentially with the component,
+so components of more than COMPONENT_LIMIT tilings raise ComponentTooLarge
+instead of running without end (6x6 already has components of 152 nodes);
+odd components have no perfect matching and count 0 at once. Partitions are streamed lazily as the Cartesian product
+of per-component matchings, so no full list of partitions is ever built.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from . import stats
+
+COMPONENT_LIMIT = 48
+
+
+class ComponentTooLarge(ValueError):
+    """A pair-graph component is too large for the bitmask matching DP."""
+
+
+def connected_components(n_nodes, edges):
+    """Returns an (n_nodes,) array of component labels (smallest member id)."""
+    labels = np.arange(n_nodes)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    u, v = edges[:, 0], edges[:, 1]
+    while True:
+        low = np.minimum(labels[u], labels[v])
+        new = labels.copy()
+        np.minimum.at(new, u, low)
+        np.minimum.at(new, v, low)
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def split_components(n_nodes, edges):
+    """
+    Splits the graph into components. Returns a list of (nodes, local_edges)
+    where `nodes` maps local vertex index -> global id and local_edges is a
+    list of (a, b) local index pairs. Nodes and edges are grouped by one sort
+    of their component labels, so the cost is O((N + E) log N).
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if n_nodes == 0:
+        return []
+    labels = connected_components(n_nodes, edges)
+    order = np.argsort(labels, kind='stable')
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(labels[order])) + 1])
+    sizes = np.diff(np.append(starts, n_nodes))
+    # Local index of every node: its rank inside its group.
+    position = np.empty(n_nodes, dtype=np.int64)
+    position[order] = np.arange(n_nodes) - np.repeat(starts, sizes)
+
+    edge_labels = labels[edges[:, 0]]
+    edge_order = np.argsort(edge_labels, kind='stable')
+    bounds = np.searchsorted(edge_labels[edge_order], labels[order[starts]])
+    local = position[edges[edge_order]]
+    return [(nodes.tolist(), [tuple(pair) for pair in mine.tolist()])
+            for nodes, mine in zip(np.split(order, starts[1:]), np.split(local, bounds[1:]))]
+
+
+def _adjacency_bits(n_local, local_edges):
+    adjacency = [0] * n_local
+    for a, b in local_edges:
+        adjacency[a] |= 1 << b
+        adjacency[b] |= 1 << a
+    return adjacency
+
+
+def _matching_counter(adjacency):
+    """Memoized count of perfect matchings of the vertex subset `mask`."""
+
+    @lru_cache(maxsize=None)
+    def count(mask):
+        if mask == 0:
+            return 1
+        low = mask & -mask
+        u = low.bit_length() - 1
+        rest = mask ^ low
+        total = 0
+        options = adjacency[u] & rest
+        while options:
+            bit = options & -options
+            total += count(rest ^ bit)
+            options ^= bit
+        return total
+
+    return count
+
+
+def _check_size(n_local, limit):
+    if limit is not None and n_local > limit:
+        raise ComponentTooLarge(
+            f"A pair-graph component of {n_local} tilings exceeds the limit of {limit} "
+            f"for counting perfect matchings.")
+
+
+def count_perfect_matchings(n_local, local_edges, limit=COMPONENT_LIMIT):
+    """
+    Number of perfect matchings of a small graph on n_local vertices.
+    Raises ComponentTooLarge above `limit` vertices (None: no limit).
+    """
+    if n_local % 2:
+        return 0
+    _check_size(n_local, limit)
+    adjacency = _adjacency_bits(n_local, local_edges)
+    count = _matching_counter(adjacency)
+    total = count((1 << n_local) - 1)
+    stats.count('matching_nodes', count.cache_info().misses)
+    stats.count('matching_memo_hits', count.cache_info().hits)
+    return total
+
+
+def iter_perfect_matchings(n_local, local_edges, limit=COMPONENT_LIMIT):
+    """Lazily yields each perfect matching as a tuple of local (a, b) pairs."""
+    _check_size(n_local, limit)
+    adjacency = _adjacency_bits(n_local, local_edges)
+    count = _matching_counter(adjacency)
+
+    def walk(mask):
+        if mask == 0:
+            yield ()
+            return
+        low = mask & -mask
+        u = low.bit_length() - 1
+        rest = mask ^ low
+        options = adjacency[u] & rest
+        while options:
+            bit = options & -options
+            options ^= bit
+            if count(rest ^ bit):
+                for tail in walk(rest ^ bit):
+                    yield ((u, bit.bit_length() - 1),) + tail
+            else:
+                stats.count('matching_pruned')
+
+    return walk((1 << n_local) - 1)
+
+
+def multiplicity_factors(n_nodes, edges, limit=COMPONENT_LIMIT):
+    """
+    Returns [(nodes, matchings), ...] for every component, i.e. the factors
+    whose product is the number of perfect complementary partitions.
+    Raises ComponentTooLarge when an even component exceeds `limit`.
+    """
+    return [(nodes, count_perfect_matchings(len(nodes), local, limit))
+            for nodes, local in split_components(n_nodes, edges)]
+
+
+def count_partitions(n_nodes, edges, limit=COMPONENT_LIMIT):
+    """Exact number of perfect complementary partitions."""
+    total = 1
+    with stats.stage('partitions'):
+        for _, factor in multiplicity_factors(n_nodes, edges, limit):
+            total *= factor
+            if total == 0:
+                break
+    return total
+
+
+def iter_partitions(n_nodes, edges, limit=COMPONENT_LIMIT):
+    """
+    Lazily yields every perfect complementary partition as a sorted tuple of
+    global (i, j) pairs, i < j.
+    """
+    components = split_components(n_nodes, edges)
+    if any(count_perfect_matchings(len(nodes), local, limit) == 0
+           for nodes, local in components):
+        return
+
+    # Depth-first walk over the Cartesian product of per-component
+    # matchings, with an explicit stack of per-level iterators.
+    def level(k):
+        nodes, local = components[k]
+        for matching in iter_perfect_matchings(len(nodes), local, limit):
+            yield tuple(tuple(sorted((nodes[a], nodes[b]))) for a, b in matching)
+
+    if not components:
+        yield ()
+        return
+    stack = [level(0)]
+    chosen = []
+    while stack:
+        pairs = next(stack[-1], None)
+        if pairs is None:
+            stack.pop()
+            if chosen:
+                chosen.pop()
+            continue
+        chosen.append(pairs)
+        if len(chosen) == len(components):
+            yield tuple(sorted(pair for part in chosen for pair in part))
+            chosen.pop()
+        else:
+            stack.append(level(len(chosen)))
@@ -0,0 +1,206 @@
+"""
+Symbolic Identity Prover for Pair-Sum Identities
+================================================
+Every metric is a polynomial in the cell weights w_0 .. w_{cells-1}. For
+example S_prod(P) = Sum w_a w_b = 1/2 w^T A_P w, where A_P is the adjacency
+matrix of the dominoes of P, and S_sum^k(P) = Sum (w_a + w_b)^k expands into
+the monomials C(k, i) w_a^i w_b^(k-i).
+
+An identity "f(Pi) + f(Pj) is the same for every pair (Pi, Pj)" therefore
+holds for *all* weightings exactly when the pair-sum polynomials coincide,
+i.e. when the integer matrix of differences (one row per pair, one column
+per monomial) has rank 0. Its rank counts the independent obstructions.
+
+On an affine family w = w0 + U t (t free parameters) the identity holds
+exactly when every difference polynomial vanishes identically in t after
+substitution. The natural square alone is the family with no parameters.
+Everything is computed over Python ints, no floating point.
+"""
+
+from math import comb
+
+import numpy as np
+
+# Block functionals as polynomials in (x, y): {(i, j): coefficient} stands for
+# Sum coefficient * x^i * y^j. S_sum^k is generated on demand.
+BLOCK_POLYNOMIALS = {
+    's_prod':  {(1, 1): 1},
+    's_prod2': {(2, 2): 1},
+}
+
+
+def block_polynomial(name):
+    """Polynomial of a block functional by metric name (s_sumK included)."""
+    if name.startswith('s_sum'):
+        k = int(name[len('s_sum'):])
+        return {(i, k - i): comb(k, i) for i in range(k + 1)}
+    return BLOCK_POLYNOMIALS[name]
+
+
+# ============================================================
+# Polynomials in the cell weights
+# ============================================================
+
+def _monomial(a, i, b, j):
+    """Canonical monomial key w_a^i * w_b^j as a sorted ((var, exp), ...)."""
+    powers = {}
+    for var, exp in ((a, i), (b, j)):
+        if exp:
+            powers[var] = powers.get(var, 0) + exp
+    return tuple(sorted(powers.items()))
+
+
+def tiling_polynomial(dominoes, poly):
+    """Polynomial {monomial: coeff} of one tiling, given its (D, 2) dominoes."""
+    result = {}
+    for a, b in np.asarray(dominoes).tolist():
+        for (i, j), coeff in poly.items():
+            key = _monomial(a, i, b, j)
+            result[key] = result.get(key, 0) + coeff
+    return {k: v for k, v in result.items() if v}
+
+
+def _add(p, q, sign=1):
+    result = dict(p)
+    for k, v in q.items():
+        result[k] = result.get(k, 0) + sign * v
+    return {k: v for k, v in result.items() if v}
+
+
+def evaluate(poly, weights):
+    """Exact value of a polynomial at an integer weight vector."""
+    weights = [int(w) for w in np.asarray(weights).reshape(-1)]
+    total = 0
+    for monomial, coeff in poly.items():
+        term = coeff
+        for var, exp in monomial:
+            term *= weights[var] ** exp
+        total += term
+    return total
+
+
+# ============================================================
+# Exact linear algebra
+# ============================================================
+
+def integer_rank(rows):
+    """
+    Rank of an integer matrix (list of lists) by Bareiss elimination. Each
+    step divides exactly by the previous pivot, so entries stay minors of
+    the input instead of growing exponentially.
+    """
+    a = [list(r) for r in rows if any(r)]
+    rank = 0
+    previous = 1
+    n_cols = len(a[0]) if a else 0
+    for col in range(n_cols):
+        pivot = next((i for i in range(rank, len(a)) if a[i][col]), None)
+        if pivot is None:
+            continue
+        a[rank], a[pivot] = a[pivot], a[rank]
+        p = a[rank]
+        for i in range(rank + 1, len(a)):
+            factor = a[i][col]
+            a[i] = [(x * p[col] - factor * y) // previous for x, y in zip(a[i], p)]
+        previous = p[col]
+        rank += 1
+    return rank
+
+
+def _matrix_over(polys):
+    """Dense integer rows of a list of polynomials over their joint support."""
+    support = sorted({k for p in polys for k in p})
+    return [[p.get(k, 0) for k in support] for p in polys]
+
+
+def substitute(poly, base, directions):
+    """
+    Substitutes w = base + directions @ t into a polynomial. `directions` is
+    (cells, m). Returns a polynomial in t as {exponent tuple: coeff}.
+    """
+    base = [int(v) for v in np.asarray(base).reshape(-1)]
+    directions = np.asarray(directions, dtype=np.int64).reshape(len(base), -1)
+    m = directions.shape[1]
+    zero = (0,) * m
+
+    def linear(var):
+        form = {zero: base[var]} if base[var] else {}
+        for i in range(m):
+            if directions[var, i]:
+                e = tuple(int(k == i) for k in range(m))
+                form[e] = int(directions[var, i])
+        return form
+
+    def multiply(p, q):
+        out = {}
+        for e1, c1 in p.items():
+            for e2, c2 in q.items():
+                e = tuple(x + y for x, y in zip(e1, e2))
+                out[e] = out.get(e, 0) + c1 * c2
+        return {k: v for k, v in out.items() if v}
+
+    result = {}
+    powers = {}
+    for monomial, coeff in poly.items():
+        term = {zero: coeff}
+        for var, exp in monomial:
+            if (var, exp) not in powers:
+                power = {zero: 1}
+                for _ in range(exp):
+                    power = multiply(power, linear(var))
+                powers[(var, exp)] = power
+            term = multiply(term, powers[(var, exp)])
+        result = _add(result, term)
+    return result
+
+
+def grid_linear_family(rows, cols):
+    """
+    The affine family w[r, c] = t0 + t1 * r + t2 * c, which contains the
+    natural square (t = (1, cols, 1)). Returns (base, directions).
+    """
+    r, c = np.divmod(np.arange(rows * cols), cols)
+    return np.zeros(rows * cols, dtype=np.int64), np.stack([np.ones_like(r), r, c], axis=1)
+
+
+# ============================================================
+# Prover
+# ============================================================
+
+def prove_pair_identity(dominoes, pairs, name, weights=None, family=None):
+    """
+    Decides for which weightings f(Pi) + f(Pj) is constant over `pairs`.
+    `dominoes` is the (N, D, 2) array of the tilings the pairs refer to.
+
+    Returns a dict with
+      'scope' - 'all' (every weighting), 'family' (the given affine family),
+                'weights' (the given weight vector only) or 'none',
+      'rank'  - rank of the pair-difference matrix over all weightings,
+      'constant' - the common pair-sum polynomial when scope is 'all',
+                   otherwise the first pair's value at `weights` (or None).
+    """
+    poly = block_polynomial(name)
+    pairs = [tuple(p) for p in np.asarray(pairs, dtype=np.int64).reshape(-1, 2).tolist()]
+    cache = {}
+
+    def tiling(i):
+        if i not in cache:
+            cache[i] = tiling_polynomial(dominoes[i], poly)
+        return cache[i]
+
+    sums = [_add(tiling(i), tiling(j)) for i, j in pairs]
+    if not sums:
+        return {'scope': 'all', 'rank': 0, 'constant': {}}
+    differences = [_add(s, sums[0], -1) for s in sums[1:]]
+    rank = integer_rank(_matrix_over(differences)) if differences else 0
+    if rank == 0:
+        return {'scope': 'all', 'rank': 0, 'constant': sums[0]}
+
+    constant = evaluate(sums[0], weights) if weights is not None else None
+    if family is not None:
+        base, directions = family
+        if all(not substitute(d, base, directions) for d in differences):
+            return {'scope': 'family', 'rank': rank, 'constant': constant}
+    if weights is not None and all(evaluate(d, weights) == 0 for d in differences):
+        return {'scope': 'weights', 'rank': rank, 'constant': constant}
+    return {'scope': 'none', 'rank': rank, 'constant': constant}
@@ -0,0 +1,229 @@
+"""
+Exact Uniform Sampling by Coupling From the Past
+================================================
+Boards such as 50x50 to 200x200 cannot be enumerated, so their metric
+distributions are estimated from exact uniform samples.
+
+The flip chain of a rectangle is monotone for the height-function order of
+flips.py: a flip at a block whose top-left cell has even r + c is "up" when
+it turns two horizontal dominoes into vertical ones, and the reverse
+elsewhere. A heat-bath update of a flippable block sets it to its up or
+down orientation on a fair coin. It keeps the uniform distribution and
+preserves the order. Blocks whose top-left cells agree in (r mod 2, c mod 2)
+never overlap, so one sweep updates the whole board in four vectorized
+steps. The update is pure AND / OR / NOT, so a batch keeps 64 chains in
+the bits of one uint64 per cell and advances them all together.
+
+Coupling from the past (Propp-Wilson) runs the chains started at the
+maximum and the minimum tiling from time -T to 0 with the same coins. When
+they agree at time 0, so does every chain, and the common state is an exact
+uniform sample. Otherwise T doubles and the coins of the most recent sweeps
+are regenerated from their seeds. Samples come out as a TilingSet. With
+`processes` > 1, batches run on a process pool, each from its own child
+seed, so the results do not depend on the pool size.
+
+Domino shuffling only applies to Aztec diamonds, so it is not used here.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from . import stats
+from .tilingset import TilingSet
+
+# Chains per uint64 word; a batch runs 64 chains per word of state.
+LANES = 64
+ALL_LANES = np.uint64(2 ** 64 - 1)
+DEFAULT_BATCH = LANES
+INITIAL_SWEEPS = 64
+
+# (r mod 2, c mod 2) of the top-left cells of the four non-overlapping
+# block classes.
+CLASSES = ((0, 0), (0, 1), (1, 0), (1, 1))
+
+
+def _sweep(horizontal, vertical, coins):
+    """
+    One heat-bath sweep, in place. horizontal / vertical: (..., rows, cols)
+    starts, either bool or uint64 with one chain per bit; coins: matching
+    (..., rows - 1, cols - 1), set = up.
+    """
+    rows, cols = horizontal.shape[-2:]
+    for a, b in CLASSES:
+        top, bottom = slice(a, rows - 1, 2), slice(a + 1, rows, 2)
+        left, right = slice(b, cols - 1, 2), slice(b + 1, cols, 2)
+        h_top, h_bottom = horizontal[..., top, left], horizontal[..., bottom, left]
+        v_left, v_right = vertical[..., top, left], vertical[..., top, right]
+        flippable = (h_top & h_bottom) | (v_left & v_right)
+        up = coins[..., a::2, b::2]
+        # Up means vertical at blocks with even r + c, horizontal elsewhere.
+        to_vertical = flippable & (up if (a + b) % 2 == 0 else ~up)
+        to_horizontal = flippable & ~to_vertical
+        for view, value, clear in ((h_top, to_horizontal, to_vertical),
+                                   (h_bottom, to_horizontal, to_vertical),
+                                   (v_left, to_vertical, to_horizontal),
+                                   (v_right, to_vertical, to_horizontal)):
+            view |= value
+            view &= ~clear
+
+
+def _vertical_of(horizontal):
+    """Vertical starts implied by a (rows, cols) horizontal-start grid."""
+    rows, cols = horizontal.shape
+    covered = horizontal.copy()
+    covered[:, 1:] |= horizontal[:, :-1]
+    vertical = np.zeros_like(horizontal)
+    open_top = np.zeros(cols, dtype=bool)
+    for r in range(rows):
+        vertical[r] = ~covered[r] & ~open_top
+        open_top = ~covered[r] & ~open_top
+    return vertical
+
+
+def extremal_tilings(rows, cols):
+    """
+    (horizontal, vertical) of the maximum and the minimum tiling, each a
+    (2, rows, cols) bool array: index 0 is the top, 1 the bottom. Found by
+    sweeping with all coins up (down) until nothing changes.
+    """
+    if (rows * cols) % 2:
+        raise ValueError(f"A {rows}x{cols} board has no domino tilings.")
+    horizontal = np.zeros((rows, cols), dtype=bool)
+    if cols % 2 == 0:
+        horizontal[:, ::2] = True
+    horizontal = np.stack([horizontal, horizontal])
+    vertical = np.stack([_vertical_of(horizontal[0])] * 2)
+    coins = np.zeros((2, max(rows - 1, 0), max(cols - 1, 0)), dtype=bool)
+    coins[0] = True
+    while True:
+        before = horizontal.copy()
+        _sweep(horizontal, vertical, coins)
+        if np.array_equal(before, horizontal):
+            return horizontal, vertical
+
+
+def _epoch_coins(seed, sweeps, words, rows, cols):
+    """Regenerates the coins of one epoch, sweep by sweep, one bit per chain."""
+    bits = np.random.default_rng(seed).bit_generator
+    shape = (words, rows - 1, cols - 1)
+    for _ in range(sweeps):
+        yield bits.random_raw(shape[0] * shape[1] * shape[2]).reshape(shape)
+
+
+def _seed_sequence(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def _to_lanes(cells, words):
+    """(2, rows, cols) bool -> (2, words, rows, cols) uint64, all lanes equal."""
+    lanes = np.where(cells, ALL_LANES, np.uint64(0))
+    return np.repeat(lanes[:, None], words, axis=1)
+
+
+def _from_lanes(lanes, size):
+    """(words, rows, cols) uint64 -> (size, rows, cols) bool, chain k in bit k."""
+    words, rows, cols = lanes.shape
+    raw = np.ascontiguousarray(lanes.astype('<u8', copy=False)).view(np.uint8)
+    bits = np.unpackbits(raw.reshape(words, rows, cols, 8), axis=-1, bitorder='little')
+    return bits.transpose(0, 3, 1, 2).reshape(-1, rows, cols)[:size].astype(bool)
+
+
+def cftp_batch(rows, cols, size, seed=None):
+    """
+    `size` independent exact uniform tilings of a rows x cols rectangle, as
+    an (size, rows, cols) bool array of horizontal-domino starts. `seed` is
+    an int or a SeedSequence.
+    """
+    start_horizontal, start_vertical = extremal_tilings(rows, cols)
+    if rows < 2 or cols < 2:
+        return np.broadcast_to(start_horizontal[0], (size, rows, cols)).copy()
+    words = max(1, -(-size // LANES))
+    used = np.zeros(words * LANES, dtype=bool)
+    used[:size] = True
+    used = np.packbits(used, bitorder='little').view('<u8').astype(np.uint64)
+    used = used[:, None, None]
+    root = _seed_sequence(seed)
+    # Epoch k covers the sweeps [-T_k, -T_{k-1}); epoch 0 is the most recent.
+    epochs = [(root.spawn(1)[0], INITIAL_SWEEPS)]
+    while True:
+        horizontal = _to_lanes(start_horizontal, words)
+        vertical = _to_lanes(start_vertical, words)
+        for epoch_seed, sweeps in reversed(epochs):
+            for coins in _epoch_coins(epoch_seed, sweeps, words, rows, cols):
+                _sweep(horizontal, vertical, coins)
+        total = sum(sweeps for _, sweeps in epochs)
+        stats.count('cftp_sweeps', total)
+        if not np.any((horizontal[0] ^ horizontal[1]) & used):
+            return _from_lanes(horizontal[0], size)
+        epochs.append((root.spawn(1)[0], total))
+
+
+def _batch_task(args):
+    rows, cols, size, seed = args
+    return cftp_batch(rows, cols, size, seed)
+
+
+def sample_tilings(rows, cols, n, seed=None, batch_size=DEFAULT_BATCH, processes=None):
+    """
+    TilingSet of n exact uniform samples. The result depends only on `seed`
+    and `batch_size`, not on `processes`.
+    """
+    children = _seed_sequence(seed).spawn(max(1, -(-n // batch_size)))
+    tasks = [(rows, cols, min(batch_size, n - start), child)
+             for start, child in zip(range(0, n, batch_size), children)]
+    with stats.stage('sample'):
+        if processes and processes > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                parts = list(pool.map(_batch_task, tasks))
+        else:
+            parts = [_batch_task(task) for task in tasks]
+    stats.count('tilings_sampled', n)
+    horizontal = (np.concatenate(parts) if parts
+                  else np.zeros((0, rows, cols), dtype=bool))
+    return TilingSet.from_horizontal_cells(rows, cols, horizontal.reshape(n, rows * cols))
+
+
+# ============================================================
+# Estimates from samples
+# ============================================================
+
+def interval(values, confidence=0.95):
+    """
+    Mean of a sample with its normal-approximation confidence interval.
+    Returns a dict with mean, std, stderr, low, high and n.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < 2:
+        raise ValueError("An interval needs at least two samples.")
+    mean = float(values.mean())
+    std = float(values.std(ddof=1))
+    stderr = std / n ** 0.5
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return {'mean': mean, 'std': std, 'stderr': stderr,
+            'low': mean - z * stderr, 'high': mean + z * stderr, 'n': n}
+
+
+def sample_intervals(samples, weights=None, k_max=3, names=('s_prod',), element=None,
+                     constants=None, confidence=0.95):
+    """
+    Confidence intervals of the metrics of sampled tilings. With `element`
+    (e.g. 'r90'), the statistic is the pair sum M(P) + M(g(P)), and for
+    every metric given in `constants` the share of samples whose pair sum
+    equals it is estimated as well (key 'hits'). The image of a uniform
+    tiling is uniform, so these are estimates over all tilings.
+    """
+    from .metrics import tiling_metrics
+
+    metrics = tiling_metrics(samples, weights, k_max, names)
+    if element is not None:
+        from .symmetry import transform_tilings
+        images = tiling_metrics(transform_tilings(samples, element), weights, k_max, names)
+        metrics = {key: values + images[key] for key, values in metrics.items()}
+    result = {key: interval(values, confidence) for key, values in metrics.items()}
+    for key, constant in (constants or {}).items():
+        hits = np.array([int(v) == constant for v in metrics[key]], dtype=np.float64)
+        result[key]['hits'] = interval(hits, confidence)
+    return result
@@ -0,0 +1,259 @@
+"""
+Run Statistics and Profiling Hooks
+==================================
+Lightweight instrumentation shared by the library and the verifier
+scripts:
+
+    with stats.stage('metrics'):      wall and CPU time per named stage
+        ...                           (nested stages are named 'outer/inner')
+    stats.count('pairs_tested', n)    integer counters
+
+When recording is off (the default) `stage` returns one shared no-op
+context manager and `count` returns after a single global check, so the
+hooks can stay in place on every hot path. Library functions report once
+per call (e.g. the number of tilings evaluated), never once per tiling.
+
+Recording is switched on by `enable()`, by the environment
+
+    DOMINO_TILING_STATS=<path>       JSON report path ('-' for stderr)
+    DOMINO_TILING_PROFILE=1|<path>   add a cProfile summary (and dump .prof)
+    DOMINO_TILING_TRACEMALLOC=1      add peak traced memory per stage
+
+or by the scripts' --stats[=PATH], --profile[=PATH] and --trace-memory
+flags (see `configure`). The report is written when the process exits.
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+FORMAT_VERSION = 1
+STATS_ENV = 'DOMINO_TILING_STATS'
+PROFILE_ENV = 'DOMINO_TILING_PROFILE'
+TRACEMALLOC_ENV = 'DOMINO_TILING_TRACEMALLOC'
+PROFILE_TOP = 25
+
+_NULL = nullcontext()
+_recorder = None
+
+
+class _Stage:
+    """Context manager timing one stage of the active recorder."""
+
+    __slots__ = ('recorder', 'name', 'start_wall', 'start_cpu', 'peak')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        recorder = self.recorder
+        if recorder.memory:
+            recorder.fold_peak()
+            tracemalloc.reset_peak()
+        self.peak = 0
+        recorder.stack.append(self)
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        recorder = self.recorder
+        if recorder.memory:
+            recorder.fold_peak()
+        recorder.stack.pop()
+        if recorder.stack:
+            recorder.stack[-1].peak = max(recorder.stack[-1].peak, self.peak)
+        path = '/'.join([s.name for s in recorder.stack] + [self.name])
+        entry = recorder.stages.setdefault(path, {'calls': 0, 'wall_seconds': 0.0,
+                                                  'cpu_seconds': 0.0})
+        entry['calls'] += 1
+        entry['wall_seconds'] += wall
+        entry['cpu_seconds'] += cpu
+        if recorder.memory:
+            entry['peak_bytes'] = max(entry.get('peak_bytes', 0), self.peak)
+        return False
+
+
+class Recorder:
+    """Collects stage timings and counters of one run."""
+
+    def __init__(self, path=None, profile=False, memory=False):
+        self.path = path
+        self.profile = profile
+        self.memory = memory
+        self.stages = {}
+        self.counters = {}
+        self.stack = []
+        self.peak = 0
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self._profiler = None
+        if profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def fold_peak(self):
+        """Credits the traced peak since the last reset to the open stage."""
+        _, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        if self.stack:
+            self.stack[-1].peak = max(self.stack[-1].peak, peak)
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+
+    def _profile_summary(self):
+        if self._profiler is None:
+            return None
+        import pstats
+        if isinstance(self.profile, str):
+            self._profiler.dump_stats(self.profile)
+        top = sorted(pstats.Stats(self._profiler).stats.items(),
+                     key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+        return [{'function': f"{file}:{line}({name})", 'calls': calls,
+                 'total_seconds': total, 'cumulative_seconds': cumulative}
+                for (file, line, name), (_, calls, total, cumulative, _) in top]
+
+    def report(self):
+        report = {
+            'format_version': FORMAT_VERSION,
+            'argv': list(sys.argv),
+            'wall_seconds': time.perf_counter() - self.start_wall,
+            'cpu_seconds': time.process_time() - self.start_cpu,
+            'stages': self.stages,
+            'counters': self.counters,
+        }
+        if self.memory and tracemalloc.is_tracing():
+            self.fold_peak()
+            report['traced_bytes'] = tracemalloc.get_traced_memory()[0]
+            report['peak_traced_bytes'] = self.peak
+        profile = self._profile_summary()
+        if profile is not None:
+            report['profile'] = profile
+        return report
+
+
+# ============================================================
+# Hooks
+# ============================================================
+
+def stage(name):
+    """Context manager timing a named stage (a no-op while disabled)."""
+    if _recorder is None:
+        return _NULL
+    return _Stage(_recorder, name)
+
+
+def count(name, n=1):
+    """Adds n to a named counter (a no-op while disabled)."""
+    if _recorder is None:
+        return
+    _recorder.counters[name] = _recorder.counters.get(name, 0) + int(n)
+
+
+def is_enabled():
+    return _recorder is not None
+
+
+# ============================================================
+# Switching and reporting
+# ============================================================
+
+def enable(path=None, profile=False, memory=False):
+    """
+    Starts recording. `path` is where `write_report` and the exit hook put
+    the JSON report ('-' for stderr, None to only collect). `profile` may be
+    True or a .prof path; `memory` turns on tracemalloc.
+    """
+    global _recorder
+    disable()
+    _recorder = Recorder(path, profile, memory)
+    return _recorder
+
+
+def disable():
+    """Stops recording and returns the finished report (or None)."""
+    global _recorder
+    if _recorder is None:
+        return None
+    recorder, _recorder = _recorder, None
+    recorder.stop()
+    return recorder.report()
+
+
+def report():
+    """Current report as a JSON-serializable dict (None while disabled)."""
+    return None if _recorder is None else _recorder.report()
+
+
+def write_report(path=None):
+    """Writes the current report to `path` (default: the enabled path)."""
+    if _recorder is None:
+        return None
+    path = _recorder.path if path is None else path
+    if path is None:
+        return None
+    _recorder.stop()
+    data = _recorder.report()
+    if path == '-':
+        json.dump(data, sys.stderr, indent=2)
+        sys.stderr.write('\n')
+    else:
+        with open(path, 'w') as handle:
+            json.dump(data, handle, indent=2)
+    return data
+
+
+def _flag(argv, name):
+    """Removes --name / --name=VALUE from argv; returns None, True or VALUE."""
+    for i, arg in enumerate(argv):
+        if arg == f'--{name}':
+            del argv[i]
+            return True
+        if arg.startswith(f'--{name}='):
+            del argv[i]
+            return arg.split('=', 1)[1]
+    return None
+
+
+def _truthy(value):
+    return value not in (None, '', '0', 'false', 'False')
+
+
+def configure(argv=None):
+    """
+    Enables recording from the command line flags or environment variables
+    and registers the exit hook that writes the report. The stats flags are
+    removed from `argv` (default sys.argv) in place; returns whether
+    recording is on.
+    """
+    argv = sys.argv if argv is None else argv
+    path = _flag(argv, 'stats')
+    profile = _flag(argv, 'profile')
+    memory = _flag(argv, 'trace-memory')
+    if path is None:
+        path = os.environ.get(STATS_ENV) or None
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENV)
+    if memory is None:
+        memory = os.environ.get(TRACEMALLOC_ENV)
+    if path is True:
+        path = '-'
+    if path is None and not _truthy(profile) and not _truthy(memory):
+        return False
+    if profile in ('1', 'true', 'True'):
+        profile = True
+    enable(path or '-', profile if _truthy(profile) else False, _truthy(memory))
+    atexit.register(write_report)
+    return True
@@ -0,0 +1,312 @@
+"""
+Memory-Mapped Binary Tiling Store
+=================================
+A store file holds N tilings of one board as fixed-width records behind a
+64-byte little-endian header:
+
+    offset  field
+    0       magic b'DOMTILE\\0'
+    8       format version (u32)
+    12      encoding (u32): 0 = packed horizontal-edge bitmask (W uint64 words,
+            see tilingset.py), 1 = domino cell indices (D x 2 int16/int32)
+    16      rows, cols (u32 each)
+    24      record size in bytes (u32)
+    28      flags (u32): bit 0 set when the records are in ascending key order
+    32      record count (u64)
+    40      CRC-32 of the record bytes (u32)
+
+`StoreWriter` appends records chunk by chunk and fills in count, checksum
+and the sorted flag on close (a writer left by an exception deletes its
+partial file instead), so a board can be enumerated straight to disk
+(`write_enumeration`). `TilingStore` maps the records with np.memmap and
+runs the metric engine, the D4 action table and the complement search
+chunk by chunk; only per-tiling results (one value per metric, one ID per
+group element) are ever held for the whole set, never the tilings
+themselves. A sorted bitmask store is searched in place by its index.
+"""
+
+import struct
+import zlib
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from .complement import complement_pairs
+from .enumerator import iter_dominoes
+from .index import CanonicalIndex
+from .metrics import _concatenate, compute_metrics, metric_names, natural_weights
+from .symmetry import action_table, group_elements
+from .tilingset import TilingSet, encode_dominoes, n_words
+
+MAGIC = b'DOMTILE\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIIIIIQI')
+HEADER_SIZE = 64
+
+BITMASK = 0
+DOMINOES = 1
+ENCODINGS = {'bitmask': BITMASK, 'dominoes': DOMINOES}
+
+FLAG_SORTED = 1
+DEFAULT_CHUNK = 1 << 18
+
+
+def _cell_dtype(rows, cols):
+    return np.dtype('<i2') if rows * cols < 2 ** 15 else np.dtype('<i4')
+
+
+def _record_layout(rows, cols, encoding):
+    """(dtype, shape) of one record."""
+    if encoding == BITMASK:
+        return np.dtype('<u8'), (n_words(rows, cols),)
+    return _cell_dtype(rows, cols), (rows * cols // 2, 2)
+
+
+def _key_bytes(words):
+    """(K, 8W) uint8 view of key rows, the bytes CanonicalIndex compares."""
+    words = np.asarray(words, dtype=np.uint64)
+    return np.ascontiguousarray(words.astype('<u8')).view(np.uint8).reshape(len(words), -1)
+
+
+def _ascending(words, previous=None):
+    """True when the (K, W) key rows (preceded by `previous`) never decrease."""
+    if previous is not None:
+        words = np.concatenate([previous.reshape(1, -1), words])
+    if len(words) < 2:
+        return True
+    if words.shape[1] == 1:
+        return bool(np.all(words[1:, 0] >= words[:-1, 0]))
+    # Multi-word keys are void views, ordered bytewise: the first differing
+    # byte decides.
+    raw = _key_bytes(words)
+    differ = raw[1:] != raw[:-1]
+    first = np.argmax(differ, axis=1)
+    rows = np.arange(len(first))
+    return bool(np.all(~differ.any(axis=1) | (raw[1:][rows, first] > raw[:-1][rows, first])))
+
+
+def dominoes_to_tilings(rows, cols, dominoes):
+    """TilingSet from an (N, D, 2) array of domino cell indices."""
+    dominoes = np.asarray(dominoes)
+    horizontal = np.zeros((len(dominoes), rows * cols), dtype=bool)
+    if cols > 1:
+        a = dominoes[..., 0].astype(np.intp)
+        is_h = dominoes[..., 1] == a + 1
+        n, _ = np.nonzero(is_h)
+        horizontal[n, a[is_h]] = True
+    return TilingSet.from_horizontal_cells(rows, cols, horizontal)
+
+
+# ============================================================
+# Writing
+# ============================================================
+
+class StoreWriter:
+    """Streams tilings of one board into a store file."""
+
+    def __init__(self, path, rows, cols, encoding='bitmask'):
+        self.path = Path(path)
+        self.rows = rows
+        self.cols = cols
+        self.encoding = ENCODINGS[encoding]
+        dtype, shape = _record_layout(rows, cols, self.encoding)
+        self.record_size = dtype.itemsize * int(np.prod(shape))
+        self.count = 0
+        self.checksum = 0
+        self.sorted = True
+        self._last = None
+        self._handle = open(self.path, 'wb')
+        self._handle.write(b'\0' * HEADER_SIZE)
+
+    def write(self, tilings):
+        """Appends a TilingSet (or an (N, W) uint64 word array)."""
+        if not isinstance(tilings, TilingSet):
+            tilings = TilingSet(self.rows, self.cols, tilings)
+        if len(tilings) == 0:
+            return
+        if self.sorted:
+            self.sorted = _ascending(tilings.words, self._last)
+            self._last = tilings.words[-1].copy()
+        if self.encoding == BITMASK:
+            records = tilings.words.astype('<u8', copy=False)
+        else:
+            records = tilings.dominoes().astype(_cell_dtype(self.rows, self.cols), copy=False)
+        data = np.ascontiguousarray(records).tobytes()
+        self.checksum = zlib.crc32(data, self.checksum)
+        self._handle.write(data)
+        self.count += len(tilings)
+
+    def close(self):
+        if self._handle is None:
+            return
+        flags = FLAG_SORTED if self.sorted else 0
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.encoding, self.rows, self.cols,
+                             self.record_size, flags, self.count, self.checksum)
+        self._handle.seek(0)
+        self._handle.write(header.ljust(HEADER_SIZE, b'\0'))
+        self._handle.close()
+        self._handle = None
+
+    def abort(self):
+        """Closes without writing the header and deletes the partial file."""
+        if self._handle is None:
+            return
+        self._handle.close()
+        self._handle = None
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_store(path, tilings, encoding='bitmask', chunk_size=DEFAULT_CHUNK):
+    """Writes a TilingSet to a store file."""
+    with StoreWriter(path, tilings.rows, tilings.cols, encoding) as writer:
+        for chunk in tilings.chunks(chunk_size):
+            writer.write(chunk)
+    return TilingStore(path)
+
+
+def write_enumeration(path, rows, cols, encoding='bitmask', chunk_size=DEFAULT_CHUNK):
+    """Enumerates a board straight to a store file, one chunk in memory at a time."""
+    masks = (encode_dominoes(d, cols) for d in iter_dominoes(rows, cols))
+    with StoreWriter(path, rows, cols, encoding) as writer:
+        while True:
+            chunk = list(islice(masks, chunk_size))
+            if not chunk:
+                break
+            writer.write(TilingSet.from_masks(rows, cols, chunk))
+    return TilingStore(path)
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+class TilingStore:
+    """Read-only np.memmap view of a store file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as handle:
+            header = handle.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+            raise ValueError(f"{self.path} is not a tiling store.")
+        (_, version, self.encoding, self.rows, self.cols, record_size, flags,
+         self.count, self.checksum) = HEADER.unpack_from(header)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported store version {version} in {self.path}.")
+        dtype, shape = _record_layout(self.rows, self.cols, self.encoding)
+        if record_size != dtype.itemsize * int(np.prod(shape)):
+            raise ValueError(f"Record size {record_size} does not match the header of {self.path}.")
+        self.sorted = bool(flags & FLAG_SORTED)
+        if self.count:
+            self.records = np.memmap(self.path, dtype=dtype, mode='r', offset=HEADER_SIZE,
+                                     shape=(self.count,) + shape)
+        else:
+            self.records = np.zeros((0,) + shape, dtype=dtype)
+        self._index = None
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        name = 'bitmask' if self.encoding == BITMASK else 'dominoes'
+        return f"TilingStore({self.rows}x{self.cols}, {self.count} tilings, {name})"
+
+    def verify(self, chunk_size=DEFAULT_CHUNK):
+        """True when the records match the header checksum."""
+        checksum = 0
+        for start in range(0, self.count, chunk_size):
+            chunk = np.ascontiguousarray(self.records[start:start + chunk_size])
+            checksum = zlib.crc32(chunk.tobytes(), checksum)
+        return checksum == self.checksum
+
+    # --------------------------------------------------------
+    # Chunked access
+    # --------------------------------------------------------
+
+    def tilings(self):
+        """
+        The whole store as a TilingSet sharing the store's index. Bitmask
+        stores are memory-mapped; domino stores are packed into memory.
+        """
+        if self.encoding == BITMASK:
+            tilings = TilingSet(self.rows, self.cols, self.records)
+        else:
+            tilings = TilingSet(self.rows, self.cols, np.concatenate(
+                [chunk.words for chunk in self.chunks()]
+                or [np.zeros((0, n_words(self.rows, self.cols)), dtype=np.uint64)]))
+        if self._index is None:
+            in_place = self.sorted and self.encoding == BITMASK
+            self._index = CanonicalIndex(tilings, assume_sorted=in_place)
+        tilings._index = self._index
+        return tilings
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK):
+        """Yields TilingSets of at most chunk_size consecutive records."""
+        for start in range(0, self.count, chunk_size):
+            records = self.records[start:start + chunk_size]
+            if self.encoding == BITMASK:
+                yield TilingSet(self.rows, self.cols, records)
+            else:
+                yield dominoes_to_tilings(self.rows, self.cols, records)
+
+    def domino_chunks(self, chunk_size=DEFAULT_CHUNK):
+        """Yields (n, D, 2) domino index arrays of consecutive records."""
+        for start in range(0, self.count, chunk_size):
+            records = self.records[start:start + chunk_size]
+            if self.encoding == BITMASK:
+                yield TilingSet(self.rows, self.cols, records).dominoes()
+            else:
+                yield np.asarray(records)
+
+    @property
+    def index(self):
+        """CanonicalIndex over the store; a sorted bitmask store is searched in place."""
+        if self._index is None:
+            self.tilings()
+        return self._index
+
+    # --------------------------------------------------------
+    # Chunked computations
+    # --------------------------------------------------------
+
+    def metrics(self, weights=None, k_max=3, names=('s_prod',), chunk_size=DEFAULT_CHUNK):
+        """tiling_metrics over the store, decoding one chunk at a time."""
+        if weights is None:
+            weights = natural_weights(self.rows, self.cols)
+        parts = [compute_metrics(d, weights, k_max, names)
+                 for d in self.domino_chunks(chunk_size)]
+        keys = metric_names(k_max, names)
+        if not parts:
+            return {key: np.zeros(0, dtype=np.int64) for key in keys}
+        return {key: _concatenate([part[key] for part in parts]) for key in keys}
+
+    def action_table(self, elements=None, chunk_size=DEFAULT_CHUNK, out=None):
+        """
+        (N, G) D4 action table of the store. `out` may be a path, in which case
+        the table is written to a memory-mapped .npy file and returned.
+        """
+        if elements is None:
+            elements = group_elements(self.rows, self.cols)
+        if out is not None and not isinstance(out, np.ndarray):
+            out = np.lib.format.open_memmap(out, mode='w+', dtype=np.int32,
+                                            shape=(self.count, len(elements)))
+        return action_table(self.tilings(), elements, chunk_size, out)
+
+    def complement_pairs(self, constants, weights=None, chunk_size=DEFAULT_CHUNK):
+        """Valid pairs (E, 2) for `constants` (metric name -> pair sum)."""
+        names = list(constants)
+        k_max = max((int(n[len('s_sum'):]) for n in names if n.startswith('s_sum')), default=0)
+        functionals = tuple(n for n in names if not n.startswith('s_sum'))
+        metrics = self.metrics(weights, k_max, functionals, chunk_size)
+        table = np.stack([metrics[name] for name in names], axis=1)
+        return complement_pairs(table, [constants[name] for name in names])
@@ -0,0 +1,242 @@
+"""
+D4 Action Tables, Fixed Points and Orbits
+=========================================
+The symmetry group of an n x n board is the dihedral group D4 (a rectangle
+keeps only e, r180, s_h and s_v). Each element permutes the cells, and hence
+maps every tiling to another tiling of the same board.
+
+Instead of transforming and renormalizing label grids one cell at a time
+(calculator0), the action on a whole TilingSet is computed once:
+
+    table[i, g] = ID of the image of tiling i under element g
+
+as an int32 (N, G) array, using the packed keys and the batch canonical
+index. |Fix(g)|, stabilizer sizes, orbit labels and the Burnside count are
+then array reductions over the table.
+
+For boards too large to enumerate, `fixed_point_counts` obtains |Fix(g)|
+without listing any tiling: a g-symmetric tiling is determined by its
+restriction to a fundamental region (half or quarter of the board), so it
+is counted by the transfer matrix of that region with the dominoes crossing
+the fold glued to their images (see transfer.boundary_counts).
+"""
+
+import numpy as np
+
+from . import stats
+from .partition import connected_components
+from .tilingset import TilingSet
+from .transfer import boundary_counts, count_tilings
+
+# Coordinate maps (r, c) -> (r', c') on a rows x cols board, using the same
+# conventions as TRANSFORMS in calculator0_symmetry_check.py.
+CELL_MAPS = {
+    'e':    lambda r, c, R, C: (r, c),
+    'r90':  lambda r, c, R, C: (c, R - 1 - r),
+    'r180': lambda r, c, R, C: (R - 1 - r, C - 1 - c),
+    'r270': lambda r, c, R, C: (C - 1 - c, r),
+    's_h':  lambda r, c, R, C: (R - 1 - r, c),
+    's_v':  lambda r, c, R, C: (r, C - 1 - c),
+    's_d1': lambda r, c, R, C: (c, r),
+    's_d2': lambda r, c, R, C: (C - 1 - c, R - 1 - r),
+}
+
+D4_ELEMENTS = ('e', 'r90', 'r180', 'r270', 's_h', 's_v', 's_d1', 's_d2')
+RECTANGLE_ELEMENTS = ('e', 'r180', 's_h', 's_v')
+
+DEFAULT_CHUNK = 1 << 18
+
+
+def group_elements(rows, cols):
+    """Symmetry elements of the board: all of D4 when square."""
+    return D4_ELEMENTS if rows == cols else RECTANGLE_ELEMENTS
+
+
+def cell_permutation(name, rows, cols):
+    """(cells,) array mapping each row-major cell index to its image."""
+    if name not in group_elements(rows, cols):
+        raise ValueError(f"{name} is not a symmetry of a {rows}x{cols} board.")
+    r, c = np.divmod(np.arange(rows * cols), cols)
+    r2, c2 = CELL_MAPS[name](r, c, rows, cols)
+    return np.asarray(r2 * cols + c2)
+
+
+def transform_tilings(tilings, name):
+    """Returns the TilingSet of images of every tiling under element `name`."""
+    perm = cell_permutation(name, tilings.rows, tilings.cols)
+    image = perm[tilings.dominoes()]
+    a = image.min(axis=2)
+    horizontal = image[..., 0] // tilings.cols == image[..., 1] // tilings.cols
+    starts = np.zeros((len(tilings), tilings.n_cells), dtype=bool)
+    rows_idx = np.broadcast_to(np.arange(len(tilings))[:, None], a.shape)
+    starts[rows_idx[horizontal], a[horizontal]] = True
+    return TilingSet.from_horizontal_cells(tilings.rows, tilings.cols, starts)
+
+
+def action_table(tilings, elements=None, chunk_size=DEFAULT_CHUNK, out=None):
+    """
+    (N, G) int32 table of image IDs under each group element. Images missing
+    from `tilings` (only possible for an incomplete set) are -1. `out` may be
+    a preallocated (N, G) array, e.g. a memory-mapped file.
+    """
+    if elements is None:
+        elements = group_elements(tilings.rows, tilings.cols)
+    table = np.empty((len(tilings), len(elements)), dtype=np.int32) if out is None else out
+    with stats.stage('action_table'):
+        index = tilings.index
+        for start in range(0, len(tilings), chunk_size):
+            chunk = tilings[start:start + chunk_size]
+            for g, name in enumerate(elements):
+                table[start:start + len(chunk), g] = index.lookup(
+                    transform_tilings(chunk, name).words)
+    stats.count('images_looked_up', table.size)
+    return table
+
+
+def element_pairs(table, element, elements=None):
+    """(N, 2) array of pairs (P, g(P)) for one group element, e.g. 'r90'."""
+    if elements is None:
+        elements = D4_ELEMENTS if table.shape[1] == len(D4_ELEMENTS) else RECTANGLE_ELEMENTS
+    image = table[:, list(elements).index(element)]
+    return np.stack([np.arange(len(table)), image], axis=1)
+
+
+def _fixed_mask(table):
+    return table == np.arange(len(table), dtype=table.dtype)[:, None]
+
+
+def fixed_counts(table, elements=None):
+    """|Fix(g)| for every element, as a dict name -> count."""
+    if elements is None:
+        elements = D4_ELEMENTS if table.shape[1] == len(D4_ELEMENTS) else RECTANGLE_ELEMENTS
+    counts = _fixed_mask(table).sum(axis=0)
+    return {name: int(n) for name, n in zip(elements, counts)}
+
+
+def fixed_ids(table, element_index):
+    """IDs of the tilings fixed by one element (column of the table)."""
+    return np.nonzero(table[:, element_index] == np.arange(len(table)))[0]
+
+
+def stabilizer_sizes(table):
+    """(N,) array: |Stab(P)| for every tiling."""
+    return _fixed_mask(table).sum(axis=1)
+
+
+def orbit_labels(table):
+    """
+    (N,) array labelling each tiling by the smallest ID in its orbit, found
+    by union-find over the edges P -> g(P).
+    """
+    n = len(table)
+    valid = table >= 0
+    source = np.broadcast_to(np.arange(n)[:, None], table.shape)[valid]
+    edges = np.stack([source, table[valid]], axis=1)
+    return connected_components(n, edges)
+
+
+def orbits(table):
+    """List of orbits (families), each a sorted array of tiling IDs."""
+    labels = orbit_labels(table)
+    order = np.argsort(labels, kind='stable')
+    _, starts = np.unique(labels[order], return_index=True)
+    return np.split(order, starts[1:])
+
+
+def burnside_orbit_count(table):
+    """Number of orbits from Burnside's lemma: Sum |Fix(g)| / |G|."""
+    total = int(_fixed_mask(table).sum())
+    if total % table.shape[1]:
+        raise ValueError("Fixed-point total is not divisible by the group order.")
+    return total // table.shape[1]
+
+
+# ============================================================
+# Counting mode: |Fix(g)| by quotient-region transfer matrices
+# ============================================================
+
+def _reverse_bits(mask, width):
+    return int(format(mask, f'0{width}b')[::-1], 2) if width else 0
+
+
+def _even_free_runs(covered, width):
+    """True when the uncovered cells of a row split into even-length runs."""
+    run = 0
+    for c in range(width):
+        if covered >> c & 1:
+            if run % 2:
+                return False
+            run = 0
+        else:
+            run += 1
+    return run % 2 == 0
+
+
+def _count_mirror_rows(rows, cols):
+    """Tilings fixed by s_h: (r, c) -> (rows-1-r, c)."""
+    half = rows // 2
+    if rows % 2:
+        # The middle row is its own mirror image: no domino may leave it, so
+        # it must be tiled by horizontal dominoes alone.
+        return count_tilings(half, cols) if cols % 2 == 0 else 0
+    # Dominoes crossing the midline are their own mirror images.
+    return sum(boundary_counts(half, cols, down=True).values())
+
+
+def _count_half_turn(rows, cols):
+    """Tilings fixed by r180: (r, c) -> (rows-1-r, cols-1-c)."""
+    if rows * cols % 2:
+        return 0
+    half = rows // 2
+    total = 0
+    for (down, _), n in boundary_counts(half, cols, down=True).items():
+        mirrored = _reverse_bits(down, cols)
+        if rows % 2 == 0:
+            # Dominoes crossing the midline come in pairs c <-> cols-1-c.
+            if down == mirrored:
+                total += n
+        elif not down & mirrored and _even_free_runs(down | mirrored, cols):
+            # The middle row is hit from above at `down` and, by symmetry,
+            # from below at `mirrored`; the rest is tiled horizontally.
+            total += n
+    return total
+
+
+def _count_quarter_turn(n):
+    """Tilings of an n x n board fixed by r90 (equivalently r270)."""
+    if n % 2:
+        return 0
+    half = n // 2
+    # A domino leaving the top-left quadrant to the right at row r is the
+    # r90 image of the one leaving it downward at column r.
+    return sum(count for (down, right), count
+               in boundary_counts(half, half, down=True, right=True).items()
+               if down == right)
+
+
+def fixed_point_counts(rows, cols):
+    """
+    |Fix(g)| for every symmetry g of a rows x cols board, counted without
+    enumerating tilings. Returns a dict name -> count.
+    """
+    counts = {
+        'e':    count_tilings(rows, cols),
+        'r180': _count_half_turn(rows, cols),
+        's_h':  _count_mirror_rows(rows, cols),
+        's_v':  _count_mirror_rows(cols, rows),
+    }
+    if rows == cols:
+        counts['r90'] = counts['r270'] = _count_quarter_turn(rows)
+        # A diagonal cell would have to be covered by a domino mapped onto
+        # itself, which no domino is under a diagonal reflection.
+        counts['s_d1'] = counts['s_d2'] = 0 if rows else 1
+    return {name: counts[name] for name in group_elements(rows, cols)}
+
+
+def orbit_count(rows, cols):
+    """Number of symmetry classes of tilings, from Burnside's lemma."""
+    counts = fixed_point_counts(rows, cols)
+    total = sum(counts.values())
+    if total % len(counts):
+        raise ValueError("Fixed-point total is not divisible by the group order.")
+    return total // len(counts)
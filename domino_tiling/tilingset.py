@@ -0,0 +1,263 @@
+"""
+Packed Edge-Bitmask Tilings and the Array-Backed TilingSet
+==========================================================
+A tiling is stored as a bitmask over cells: bit p is set when cell p is the
+left cell of a horizontal domino, i.e. when the grid edge between p and p+1
+is covered. The vertical dominoes are then forced: the remaining cells of
+every column pair up from top to bottom. One bit per horizontal edge is
+therefore a complete, labelling-free encoding of the tiling.
+
+Boards with up to 64 cells (8x8 and smaller) fit in a single uint64 word;
+larger boards use ceil(cells / 64) little-endian words per tiling. A
+`TilingSet` keeps N tilings in one (N, W) uint64 NumPy array, so the
+12,988,816 tilings of the 8x8 board take about 100 MB.
+"""
+
+import hashlib
+
+import numpy as np
+
+from . import stats
+from .enumerator import iter_dominoes, to_label_grid
+from .kasteleyn import kasteleyn_count
+
+WORD_BITS = 64
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+
+def n_words(rows, cols):
+    """Number of uint64 words needed per tiling."""
+    return max(1, -(-rows * cols // WORD_BITS))
+
+
+def encode_dominoes(dominoes, cols):
+    """Packs a sequence of dominoes (a, b) into a horizontal-edge bitmask."""
+    mask = 0
+    for a, b in dominoes:
+        if b == a + 1 and cols > 1:
+            mask |= 1 << a
+    return mask
+
+
+def parse_labels(text, rows, cols):
+    """
+    Parses a label pattern in any of the scripts' text formats (16-char
+    string, space-separated string, multi-line letter block) into a grid.
+    """
+    tokens = text.split()
+    if len(tokens) == 1:
+        tokens = list(tokens[0])
+    if len(tokens) != rows * cols:
+        raise ValueError(f"Pattern has {len(tokens)} cells, expected {rows * cols}.")
+    return [tokens[r * cols:(r + 1) * cols] for r in range(rows)]
+
+
+def encode_label_grid(grid):
+    """
+    Packs a label grid (list-of-lists, tuple-of-tuples, numpy array, any
+    hashable labels) into a horizontal-edge bitmask.
+    """
+    rows = len(grid)
+    cols = len(grid[0]) if rows else 0
+    cells = {}
+    for r in range(rows):
+        for c in range(cols):
+            cells.setdefault(grid[r][c], []).append(r * cols + c)
+    mask = 0
+    for label, members in cells.items():
+        if len(members) != 2:
+            raise ValueError(f"Label {label} covers {len(members)} cells, not 2.")
+        a, b = members
+        if b == a + 1 and a // cols == b // cols:
+            mask |= 1 << a
+        elif b != a + cols:
+            raise ValueError(f"Label {label} does not form a domino.")
+    return mask
+
+
+def mask_to_words(mask, words):
+    """Splits a Python int bitmask into a list of uint64 words."""
+    return [(mask >> (WORD_BITS * w)) & _WORD_MASK for w in range(words)]
+
+
+def words_to_mask(row):
+    """Joins a row of uint64 words back into a Python int bitmask."""
+    mask = 0
+    for w, word in enumerate(row):
+        mask |= int(word) << (WORD_BITS * w)
+    return mask
+
+
+class TilingSet:
+    """
+    N tilings of a rows x cols board held as an (N, W) uint64 array of
+    horizontal-edge bitmasks. Slicing returns a view-backed TilingSet.
+    """
+
+    def __init__(self, rows, cols, words):
+        words = np.asarray(words, dtype=np.uint64)
+        if words.ndim == 1:
+            words = words.reshape(-1, 1)
+        if words.shape[1] != n_words(rows, cols):
+            raise ValueError(
+                f"A {rows}x{cols} board needs {n_words(rows, cols)} words per "
+                f"tiling, got {words.shape[1]}.")
+        self.rows = rows
+        self.cols = cols
+        self.words = words
+        self._index = None
+        self._digest = None
+
+    # --------------------------------------------------------
+    # Construction
+    # --------------------------------------------------------
+
+    @classmethod
+    def from_masks(cls, rows, cols, masks, count=None):
+        """Builds a TilingSet from an iterable of Python int bitmasks."""
+        width = n_words(rows, cols)
+        if width == 1:
+            words = np.fromiter(masks, dtype=np.uint64,
+                                count=-1 if count is None else count)
+        else:
+            words = np.array([mask_to_words(m, width) for m in masks],
+                             dtype=np.uint64).reshape(-1, width)
+        return cls(rows, cols, words)
+
+    @classmethod
+    def from_horizontal_cells(cls, rows, cols, horizontal):
+        """Packs an (N, cells) bool array of horizontal-domino starts."""
+        horizontal = np.asarray(horizontal, dtype=bool).reshape(-1, rows * cols)
+        width = n_words(rows, cols)
+        padded = np.zeros((len(horizontal), width * WORD_BITS), dtype=bool)
+        padded[:, :rows * cols] = horizontal
+        packed = np.packbits(padded, axis=1, bitorder='little')
+        return cls(rows, cols, packed.view('<u8').astype(np.uint64, copy=False))
+
+    @classmethod
+    def from_enumeration(cls, rows, cols):
+        """
+        Enumerates every tiling of the board straight into a packed array,
+        and checks the population against Kasteleyn's count (ValueError on
+        a mismatch).
+        """
+        expected = kasteleyn_count(rows, cols)
+        with stats.stage('enumerate'):
+            masks = (encode_dominoes(d, cols) for d in iter_dominoes(rows, cols))
+            try:
+                tilings = cls.from_masks(rows, cols, masks, count=expected)
+                complete = next(masks, None) is None
+            except ValueError:
+                # np.fromiter ran out of masks before `expected`.
+                tilings, complete = None, False
+        if not complete or len(tilings) != expected:
+            raise ValueError(f"The enumeration of {rows}x{cols} does not match "
+                             f"Kasteleyn's count of {expected:,} tilings.")
+        stats.count('tilings_enumerated', len(tilings))
+        return tilings
+
+    @classmethod
+    def from_label_grids(cls, grids):
+        """Builds a TilingSet from label grids in any of the scripts' formats."""
+        grids = list(grids)
+        rows = len(grids[0])
+        cols = len(grids[0][0])
+        return cls.from_masks(rows, cols, (encode_label_grid(g) for g in grids))
+
+    # --------------------------------------------------------
+    # Container protocol
+    # --------------------------------------------------------
+
+    def __len__(self):
+        return self.words.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return words_to_mask(self.words[index])
+        return TilingSet(self.rows, self.cols, self.words[index])
+
+    def __iter__(self):
+        for row in self.words:
+            yield words_to_mask(row)
+
+    def __repr__(self):
+        return f"TilingSet({self.rows}x{self.cols}, {len(self)} tilings)"
+
+    @property
+    def n_cells(self):
+        return self.rows * self.cols
+
+    @property
+    def n_dominoes(self):
+        return self.n_cells // 2
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    @property
+    def index(self):
+        """Canonical-key -> ID index, built once and shared by all callers."""
+        if self._index is None:
+            from .index import CanonicalIndex
+            self._index = CanonicalIndex(self)
+        return self._index
+
+    @property
+    def digest(self):
+        """Short SHA-256 digest of the packed words, computed once."""
+        if self._digest is None:
+            data = np.ascontiguousarray(self.words.astype('<u8', copy=False))
+            self._digest = hashlib.sha256(data).hexdigest()[:16]
+        return self._digest
+
+    def chunks(self, chunk_size):
+        """Yields consecutive TilingSet views of at most chunk_size tilings."""
+        for start in range(0, len(self), chunk_size):
+            yield self[start:start + chunk_size]
+
+    # --------------------------------------------------------
+    # Decoding
+    # --------------------------------------------------------
+
+    def horizontal_cells(self):
+        """(N, cells) bool array: True where a horizontal domino starts."""
+        raw = np.ascontiguousarray(self.words.astype('<u8', copy=False))
+        bits = np.unpackbits(raw.view(np.uint8).reshape(len(self), 8 * self.words.shape[1]),
+                             axis=1, bitorder='little')
+        return bits[:, :self.n_cells].astype(bool)
+
+    def vertical_cells(self, horizontal=None):
+        """(N, cells) bool array: True where a vertical domino starts."""
+        if horizontal is None:
+            horizontal = self.horizontal_cells()
+        h = horizontal.reshape(len(self), self.rows, self.cols)
+        free = ~h
+        free[:, :, 1:] &= ~h[:, :, :-1]
+        tops = np.zeros_like(h)
+        # Free cells of a column pair up top to bottom; track the parity of
+        # the current run of free cells.
+        open_top = np.zeros((len(self), self.cols), dtype=bool)
+        for r in range(self.rows):
+            tops[:, r] = free[:, r] & ~open_top
+            open_top = free[:, r] & ~open_top
+        return tops.reshape(len(self), self.n_cells)
+
+    def dominoes(self):
+        """
+        (N, D, 2) array of domino cell indices (a, b), a < b, with dominoes
+        in canonical label order.
+        """
+        horizontal = self.horizontal_cells()
+        starts = horizontal | self.vertical_cells(horizontal)
+        dtype = np.int16 if self.n_cells < 2 ** 15 else np.int32
+        _, first = np.nonzero(starts)
+        first = first.astype(dtype).reshape(len(self), self.n_dominoes)
+        is_h = np.take_along_axis(horizontal, first.astype(np.intp), axis=1)
+        second = first + np.where(is_h, 1, self.cols).astype(dtype)
+        return np.stack([first, second], axis=2)
+
+    def label_grids(self):
+        """Yields each tiling as a canonical tuple-of-tuples label grid."""
+        for dominoes in self.dominoes():
+            yield to_label_grid(dominoes.tolist(), self.rows, self.cols)
@@ -0,0 +1,298 @@
+"""
+Broken-Profile Transfer Matrix for Domino Tilings
+=================================================
+Cells of an m x n board are visited in row-major order. The state at cell p
+is a bitmask over the n cells p, p+1, ..., p+n-1: bit j is set when cell
+p+j is already covered by a vertical domino placed from the row above (or by
+the right half of a horizontal domino placed at p-1).
+
+At an uncovered cell p there are at most two moves:
+  * horizontal: cover p and p+1 (the domino is labelled in first-encounter
+    order, so this is always tried first),
+  * vertical:   cover p and p+n.
+
+Counting completions of every state backwards gives the transfer table used
+to prune dead ends during enumeration. Counting alone sweeps the cells
+forwards and keeps only the current frontier of profiles.
+
+Grouping the cell steps of one full row gives the classical row-to-row
+transfer matrix T of a fixed width: T[a][b] counts the ways to fill a row
+whose cells in `a` are already covered from above, leaving the cells in `b`
+of the next row covered from this one. The number of tilings of an
+n-row strip is (T^n)[0][0], obtained by repeated squaring in O(log n)
+matrix products: exactly over Python ints, or modulo an integer in NumPy
+int64 (imported only then, so counting and enumeration stay NumPy-free).
+Short strips, where a few sparse vector steps beat the dense squarings,
+take that path instead.
+"""
+
+from functools import lru_cache
+
+HORIZONTAL = 0
+VERTICAL = 1
+
+# Moduli below this reduce in int64: operands are split into 16-bit halves,
+# so every product stays below 2^47 and a row of sums below 2^63.
+INT64_MODULUS_LIMIT = 2 ** 31
+
+# Strips of at most STEP_FACTOR * states^2 rows are counted by sparse row
+# steps; measured, that beats repeated squaring up to about this length.
+STEP_FACTOR = 4
+
+
+def _skip_covered(p, mask, n_cells):
+    """Advance past cells that are already covered."""
+    while p < n_cells and mask & 1:
+        p += 1
+        mask >>= 1
+    return p, mask
+
+
+def profile_moves(rows, cols):
+    """
+    Returns a dict (p, mask) -> [(orientation, next_p, next_mask), ...] for
+    every state reachable from the empty board. The next state is already
+    advanced past covered cells. Horizontal moves come before vertical ones.
+    """
+    n_cells = rows * cols
+    top = 1 << (cols - 1) if cols else 0
+    moves = {}
+    pending = [(0, 0)]
+    while pending:
+        state = pending.pop()
+        if state in moves:
+            continue
+        p, mask = state
+        options = []
+        if p < n_cells:
+            r, c = divmod(p, cols)
+            if c + 1 < cols and not mask & 2:
+                nxt = _skip_covered(p + 2, mask >> 2, n_cells)
+                options.append((HORIZONTAL,) + nxt)
+            if r + 1 < rows:
+                nxt = _skip_covered(p + 1, (mask >> 1) | top, n_cells)
+                options.append((VERTICAL,) + nxt)
+        moves[state] = options
+        for _, q, m in options:
+            if (q, m) not in moves:
+                pending.append((q, m))
+    return moves
+
+
+def completion_counts(rows, cols, moves=None):
+    """
+    Returns a dict (p, mask) -> number of ways to finish the tiling from that
+    state. The empty-board state (0, 0) holds the total tiling count.
+    """
+    if moves is None:
+        moves = profile_moves(rows, cols)
+    n_cells = rows * cols
+    counts = {}
+    # States only ever move forward, so visiting them by decreasing p is a
+    # valid topological order.
+    for state in sorted(moves, key=lambda s: s[0], reverse=True):
+        p, mask = state
+        if p == n_cells:
+            counts[state] = 1 if mask == 0 else 0
+        else:
+            counts[state] = sum(counts[(q, m)] for _, q, m in moves[state])
+    return counts
+
+
+def count_tilings(rows, cols):
+    """
+    Exact number of domino tilings of a rows x cols board. Only the current
+    profile frontier is kept (boundary_counts without protrusions), so memory
+    is O(2^min(rows, cols)) rather than one entry per (cell, profile) state.
+    """
+    if rows * cols % 2:
+        return 0
+    # The profile has 2^cols states; count on the narrower orientation.
+    rows, cols = max(rows, cols), min(rows, cols)
+    if cols == 0:
+        return 1
+    return boundary_counts(rows, cols).get((0, 0), 0)
+
+
+def boundary_counts(rows, cols, down=False, right=False):
+    """
+    Counts tilings of a rows x cols region whose dominoes may stick out of
+    the region: below the last row when `down`, and to the right of the last
+    column when `right`. Returns a dict (down_mask, right_mask) -> count,
+    where bit c of down_mask marks a domino leaving cell (rows-1, c) and bit
+    r of right_mask marks a domino leaving cell (r, cols-1).
+
+    These are the transfer-matrix counts of a quotient region: the folded
+    half (or quarter) of a board whose boundary dominoes are glued to their
+    mirror images.
+    """
+    top = 1 << (cols - 1)
+    states = {(0, 0): 1}
+    for p in range(rows * cols):
+        r, c = divmod(p, cols)
+        nxt = {}
+        for (mask, extra), n in states.items():
+            if mask & 1:
+                moves = [(mask >> 1, extra)]
+            else:
+                moves = []
+                if c + 1 < cols and not mask & 2:
+                    moves.append(((mask >> 1) | 1, extra))
+                if r + 1 < rows or down:
+                    moves.append(((mask >> 1) | top, extra))
+                if right and c == cols - 1:
+                    moves.append((mask >> 1, extra | (1 << r)))
+            for state in moves:
+                nxt[state] = nxt.get(state, 0) + n
+        states = nxt
+    return states
+
+
+# ============================================================
+# Row-to-row transfer matrix and fast strip counts
+# ============================================================
+
+def _row_fillings(width, covered):
+    """Yields the down-protrusion mask of every way to fill one row."""
+    def walk(c, down):
+        if c == width:
+            yield down
+            return
+        if covered >> c & 1:
+            yield from walk(c + 1, down)
+            return
+        if c + 1 < width and not covered >> (c + 1) & 1:
+            yield from walk(c + 2, down)
+        yield from walk(c + 1, down | 1 << c)
+    return walk(0, 0)
+
+
+@lru_cache(maxsize=None)
+def row_transfer_matrix(width):
+    """
+    Returns (states, T): the profile masks reachable from (and leading back
+    to) the empty profile, and the row-to-row transfer matrix over them as a
+    tuple of tuples of ints. states[0] is the empty profile.
+    """
+    reached = [0]
+    seen = {0}
+    raw = {}
+    for a in reached:
+        raw[a] = {}
+        for b in _row_fillings(width, a):
+            raw[a][b] = raw[a].get(b, 0) + 1
+            if b not in seen:
+                seen.add(b)
+                reached.append(b)
+    # Keep only states from which the empty profile can be reached again.
+    alive = {0}
+    changed = True
+    while changed:
+        changed = False
+        for a in reached:
+            if a not in alive and any(b in alive for b in raw[a]):
+                alive.add(a)
+                changed = True
+    states = tuple(a for a in reached if a in alive)
+    position = {a: i for i, a in enumerate(states)}
+    matrix = [[0] * len(states) for _ in states]
+    for a in states:
+        for b, n in raw[a].items():
+            if b in position:
+                matrix[position[a]][position[b]] = n
+    return states, tuple(tuple(row) for row in matrix)
+
+
+def _mat_mul(a, b, modulus):
+    """a @ b over Python ints (lists of lists), reduced modulo `modulus`."""
+    columns = list(zip(*b))
+    result = []
+    for row in a:
+        out = [sum(x * y for x, y in zip(row, col)) for col in columns]
+        if modulus is not None:
+            out = [v % modulus for v in out]
+        result.append(out)
+    return result
+
+
+def _mat_mul_int64(a, b, modulus):
+    """a @ b % modulus on int64 arrays with entries in [0, modulus)."""
+    if (modulus - 1) ** 2 * a.shape[1] < 2 ** 63:
+        return a @ b % modulus
+    high = a @ (b >> 16) % modulus
+    return ((high << 16) + a @ (b & 0xFFFF)) % modulus
+
+
+def _int64_modulus(modulus, size):
+    """True when products modulo `modulus` of size-square matrices fit int64."""
+    return modulus is not None and modulus < INT64_MODULUS_LIMIT and size < 2 ** 16
+
+
+def matrix_power(matrix, exponent, modulus=None, row=None):
+    """
+    Square-matrix power by repeated squaring, as a list of lists of ints
+    (exact or modulo `modulus`). Moduli below INT64_MODULUS_LIMIT multiply
+    in NumPy int64, exact powers and larger moduli in Python ints. With
+    `row`, only that row of the power is returned.
+    """
+    size = len(matrix)
+    result = [[int(i == j) for j in range(size)] for i in range(size)]
+    if row is not None:
+        result = result[row:row + 1]
+    base = [list(r) for r in matrix]
+    multiply = _mat_mul
+    if modulus is not None:
+        result = [[v % modulus for v in r] for r in result]
+        base = [[v % modulus for v in r] for r in base]
+        if _int64_modulus(modulus, size):
+            import numpy as np
+            result = np.array(result, dtype=np.int64)
+            base = np.array(base, dtype=np.int64)
+            multiply = _mat_mul_int64
+    while exponent:
+        if exponent & 1:
+            result = multiply(result, base, modulus)
+        exponent >>= 1
+        if exponent:
+            base = multiply(base, base, modulus)
+    if not isinstance(result, list):
+        result = result.tolist()
+    return result if row is None else result[0]
+
+
+def _strip_steps(matrix, length, modulus=None):
+    """Row 0 of T^length by `length` sparse vector-matrix steps."""
+    moves = [[(b, n) for b, n in enumerate(r) if n] for r in matrix]
+    vector = [1] + [0] * (len(matrix) - 1)
+    for _ in range(length):
+        step = [0] * len(matrix)
+        for a, x in enumerate(vector):
+            if x:
+                for b, n in moves[a]:
+                    step[b] += x * n
+        vector = step if modulus is None else [v % modulus for v in step]
+    return vector
+
+
+def count_strip_tilings(width, length, modulus=None):
+    """
+    Number of domino tilings of a board `length` rows long and `width`
+    columns wide, in O(log length) transfer-matrix products. With `modulus`
+    the count is returned modulo that integer.
+
+    The matrix has C(width, width // 2) states and each product costs
+    O(states^3). Strips up to STEP_FACTOR * states^2 rows long are stepped
+    row by row instead, which is faster there. Modulo a prime below 2^31,
+    width 10 takes well under a second for any length and width 12 about
+    a minute. Exact counts have O(width * length) bits, so big-int
+    multiplication dominates: 4 x 10^5 takes about 3 s, 4 x 4*10^6 (six
+    million bits) about two minutes, and width 10 by 1000 half a second.
+    """
+    if width * length % 2:
+        return 0
+    states, matrix = row_transfer_matrix(width)
+    if length <= STEP_FACTOR * len(states) ** 2:
+        value = _strip_steps(matrix, length, modulus)[0]
+    else:
+        value = matrix_power(matrix, length, modulus, row=0)[0]
+    return value % modulus if modulus is not None else value
@@ -0,0 +1,80 @@
+"""
+Cell Weightings
+===============
+The paper weights the 4x4 board with the natural square 1..16. The identity
+checks can be repeated under other weightings, given as a (W, cells) integer
+tensor with one row-major weighting per row:
+
+  * magic squares (all 8 D4 images of a standard magic square),
+  * random permutations of 1..cells,
+  * random integer grids.
+"""
+
+import numpy as np
+
+from .symmetry import cell_permutation, group_elements
+
+
+def _odd_magic(n):
+    """Siamese-method magic square of odd order n."""
+    square = np.zeros((n, n), dtype=np.int64)
+    r, c = 0, n // 2
+    for value in range(1, n * n + 1):
+        square[r, c] = value
+        nr, nc = (r - 1) % n, (c + 1) % n
+        if square[nr, nc]:
+            nr, nc = (r + 1) % n, c
+        r, c = nr, nc
+    return square
+
+
+def magic_square(n):
+    """A standard magic square of order n >= 3 with entries 1..n^2."""
+    if n < 3:
+        raise ValueError("Magic squares exist only for n >= 3.")
+    if n % 2:
+        return _odd_magic(n)
+    if n % 4 == 0:
+        # Doubly even: complement the cells on the diagonals of each 4x4 block.
+        square = np.arange(1, n * n + 1, dtype=np.int64).reshape(n, n)
+        i, j = np.indices((n, n)) % 4
+        flip = (i == j) | (i + j == 3)
+        square[flip] = n * n + 1 - square[flip]
+        return square
+    # Singly even (Strachey): four shifted odd squares with column swaps.
+    m = n // 2
+    k = (n - 2) // 4
+    base = _odd_magic(m)
+    square = np.block([[base, base + 2 * m * m],
+                       [base + 3 * m * m, base + m * m]])
+    for i in range(m):
+        for j in range(n):
+            middle = i == m // 2
+            if (j < k and not middle) or (middle and 1 <= j <= k) or j > n - k:
+                square[i, j], square[i + m, j] = square[i + m, j], square[i, j]
+    return square
+
+
+def magic_square_weights(n):
+    """(8, n*n) tensor: the D4 images of magic_square(n)."""
+    flat = magic_square(n).reshape(-1)
+    images = []
+    for name in group_elements(n, n):
+        perm = cell_permutation(name, n, n)
+        image = np.empty_like(flat)
+        image[perm] = flat
+        images.append(image)
+    return np.stack(images)
+
+
+def permuted_weights(rows, cols, count, seed=None):
+    """(count, cells) tensor of random permutations of 1..cells."""
+    rng = np.random.default_rng(seed)
+    base = np.arange(1, rows * cols + 1, dtype=np.int64)
+    return rng.permuted(np.tile(base, (count, 1)), axis=1)
+
+
+def random_integer_weights(rows, cols, count, low=1, high=100, seed=None):
+    """(count, cells) tensor of independent uniform integers in [low, high]."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(low, high + 1, size=(count, rows * cols), dtype=np.int64)
@@ -27,6 +27,8 @@ Methodology:
 import numpy as np
 from collections import defaultdict
 
+from domino_tiling import stats
+
 # ============================================================
 # Definition of 36 Domino Tiling Patterns (4x4 Grid)
 # ============================================================
@@ -92,45 +94,51 @@ def s_prod(pattern):
 # Target Constants
 C1, C2, C3, Cp = 272, 5848, 141032, 1428
 
-# Cache metrics for all patterns
-metrics = {}
-for pid, pat in patterns.items():
-    metrics[pid] = {
-        's1': s_sum_k(pat, 1),
-        's2': s_sum_k(pat, 2),
-        's3': s_sum_k(pat, 3),
-        'sp': s_prod(pat),
-    }
+def compute_all_metrics():
+    """Returns {pid: {'s1', 's2', 's3', 'sp'}} for all 36 patterns."""
+    metrics = {}
+    with stats.stage('metrics'):
+        for pid, pat in patterns.items():
+            metrics[pid] = {
+                's1': s_sum_k(pat, 1),
+                's2': s_sum_k(pat, 2),
+                's3': s_sum_k(pat, 3),
+                'sp': s_prod(pat),
+            }
+    return metrics
 
 # ============================================================
 # Step 1: Pre-filter Valid Pairs (C(36,2) = 630 checks)
 # ============================================================
-def is_valid_pair(i, j):
-    a, b = metrics[i], metrics[j]
-    return (abs(a['s1']+b['s1']-C1) < 1e-9 and
-            abs(a['s2']+b['s2']-C2) < 1e-9 and
-            abs(a['s3']+b['s3']-C3) < 1e-9 and
-            abs(a['sp']+b['sp']-Cp) < 1e-9)
-
-valid_pairs = [(i, j) for i in range(1, 37) for j in range(i+1, 37) 
-               if is_valid_pair(i, j)]
+def is_valid_pair(a, b):
+    """a, b: metric dicts of two patterns."""
+    stats.count('pairs_tested')
+    # Metrics are Python ints, so the identities are checked exactly
+    return (a['s1']+b['s1'] == C1 and
+            a['s2']+b['s2'] == C2 and
+            a['s3']+b['s3'] == C3 and
+            a['sp']+b['sp'] == Cp)
+
+def find_valid_pairs(metrics):
+    with stats.stage('pair_filter'):
+        return [(i, j) for i in range(1, 37) for j in range(i+1, 37)
+                if is_valid_pair(metrics[i], metrics[j])]
 
 # ============================================================
 # Step 2: Build and Analyze the Adjacency Graph
 # ============================================================
-adj = defaultdict(list)
-for i, j in valid_pairs:
-    adj[i].append(j)
-    adj[j].append(i)
-
-# Identify fixed patterns vs. patterns with degrees > 1
-ambiguous = {pid: partners for pid, partners in adj.items() if len(partners) > 1}
-fixed = {pid: partners[0] for pid, partners in adj.items() if len(partners) == 1}
+def build_graph(valid_pairs):
+    adj = defaultdict(list)
+    for i, j in valid_pairs:
+        adj[i].append(j)
+        adj[j].append(i)
+    return adj
 
 # ============================================================
 # Step 3: Recursive Enumeration of Perfect Matchings
 # ============================================================
 def enumerate_perfect_matchings(nodes, adj_list):
+    stats.count('recursion_nodes')
     if not nodes:
         return [frozenset()]
     results = []
@@ -143,26 +151,13 @@ def enumerate_perfect_matchings(nodes, adj_list):
         pair = frozenset([pivot, neighbor])
         remaining = nodes - {pivot, neighbor}
         sub_matchings = enumerate_perfect_matchings(remaining, adj_list)
+        if not sub_matchings:
+            stats.count('pruned_branches')
         for m in sub_matchings:
             results.append(m | {pair})
     return results
 
-# Execute enumeration
-all_nodes = frozenset(range(1, 37))
-all_matchings = enumerate_perfect_matchings(all_nodes, adj)
-
-# ============================================================
-# Final Output and Analysis
-# ============================================================
-print("=" * 75)
-print(" APCP Enumerator: Algebraic Perfect Complementary Partition Analysis")
-print("=" * 75)
-print(f"[Step 1] Number of Valid Pairs (Edges): {len(valid_pairs)}")
-print(f"[Step 2] Patterns with Degree > 1 (Ambiguity): {len(ambiguous)}")
-print(f"[Step 3] Total Number of Perfect Matchings (Partitions): {len(all_matchings)}")
-print("-" * 75)
-
-# Verification against partitions mentioned in the paper
+# Partitions mentioned in the paper
 partition_paper1 = frozenset([
     frozenset((3,34)), frozenset((19,23)), frozenset((14,27)), frozenset((20,22)),
     frozenset((1,36)), frozenset((15,26)), frozenset((5,32)),  frozenset((13,28)),
@@ -179,22 +174,50 @@ partition_paper2 = frozenset([
     frozenset((20,27)), frozenset((21,26)),
 ])
 
-for idx, matching in enumerate(sorted(all_matchings, 
-    key=lambda m: sorted(tuple(sorted(p)) for p in m)), 1):
-    print(f"\n[Partition {idx:02d}]")
-    pairs_sorted = sorted(tuple(sorted(p)) for p in matching)
-    free = [p for p in pairs_sorted if p[0] in ambiguous or p[1] in ambiguous]
-    print(f"  Dynamic Pairs (Ambiguous): {free}")
+# ============================================================
+# Final Output and Analysis
+# ============================================================
+def main():
+    metrics = compute_all_metrics()
+    valid_pairs = find_valid_pairs(metrics)
+    adj = build_graph(valid_pairs)
+
+    # Identify fixed patterns vs. patterns with degrees > 1
+    ambiguous = {pid: partners for pid, partners in adj.items() if len(partners) > 1}
+
+    all_nodes = frozenset(range(1, 37))
+    with stats.stage('matchings'):
+        all_matchings = enumerate_perfect_matchings(all_nodes, adj)
+
+    print("=" * 75)
+    print(" APCP Enumerator: Algebraic Perfect Complementary Partition Analysis")
+    print("=" * 75)
+    print(f"[Step 1] Number of Valid Pairs (Edges): {len(valid_pairs)}")
+    print(f"[Step 2] Patterns with Degree > 1 (Ambiguity): {len(ambiguous)}")
+    print(f"[Step 3] Total Number of Perfect Matchings (Partitions): {len(all_matchings)}")
+    print("-" * 75)
+
+    for idx, matching in enumerate(sorted(all_matchings, 
+        key=lambda m: sorted(tuple(sorted(p)) for p in m)), 1):
+        print(f"\n[Partition {idx:02d}]")
+        pairs_sorted = sorted(tuple(sorted(p)) for p in matching)
+        free = [p for p in pairs_sorted if p[0] in ambiguous or p[1] in ambiguous]
+        print(f"  Dynamic Pairs (Ambiguous): {free}")
     
-    if matching == partition_paper1:
-        print("  --> Corresponds to Paper Partition (1)")
-    if matching == partition_paper2:
-        print("  --> Corresponds to Paper Partition (2)")
-
-print("\n" + "=" * 75)
-print(" FINAL CONCLUSION")
-print("=" * 75)
-print(f" Total Partitions found: {len(all_matchings)}")
-print(" The result confirms that the multiplicity is exactly 12, derived from:")
-print(" Matching(K4) * Matching(K2,2) * Matching(K2,2) = 3 * 2 * 2 = 12.")
-print(" All 12 partitions satisfy the 4 algebraic identities for all 18 pairs.")
\ No newline at end of file
+        if matching == partition_paper1:
+            print("  --> Corresponds to Paper Partition (1)")
+        if matching == partition_paper2:
+            print("  --> Corresponds to Paper Partition (2)")
+
+    print("\n" + "=" * 75)
+    print(" FINAL CONCLUSION")
+    print("=" * 75)
+    print(f" Total Partitions found: {len(all_matchings)}")
+    print(" The result confirms that the multiplicity is exactly 12, derived from:")
+    print(" Matching(K4) * Matching(K2,2) * Matching(K2,2) = 3 * 2 * 2 = 12.")
+    print(" All 12 partitions satisfy the 4 algebraic identities for all 18 pairs.")
+
+
+if __name__ == "__main__":
+    stats.configure()
+    main()